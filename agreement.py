@@ -1,3 +1,4 @@
+import calendar
 import datetime
 import typing
 
@@ -5,6 +6,8 @@ from common import constants
 
 
 class Agreement:
+    __slots__ = ("id", "cpf", "payed", "promise", "value", "create_date", "d_plus")
+
     def __init__(self, cpf: str, value: float, create_date: datetime.date, d_plus: int, payed: bool = False,
                  promise: bool = False, id_: typing.Optional[int] = None):
         self.id = id_
@@ -21,24 +24,141 @@ class Agreement:
     def get_cancel_date(self) -> datetime.date:
         return self.create_date + datetime.timedelta(days=self.d_plus + constants.CANCEL_IN_DAYS)
 
-    def is_cancelled(self) -> bool:
-        return (datetime.date.today() - self.get_cancel_date()).days >= 0
+    def is_cancelled(self, today: typing.Optional[datetime.date] = None) -> bool:
+        return self.get_cancel_date() <= (datetime.date.today() if today is None else today)
 
-    def is_overdue(self) -> bool:
-        return (datetime.date.today() - self.get_due_date()).days > 0
+    def is_overdue(self, today: typing.Optional[datetime.date] = None) -> bool:
+        return self.get_due_date() < (datetime.date.today() if today is None else today)
 
-    def is_active(self):
-        return not self.payed and not self.is_overdue() and not self.is_cancelled()
+    def is_active(self, today: typing.Optional[datetime.date] = None):
+        today = datetime.date.today() if today is None else today
+        return not self.payed and not self.is_overdue(today) and not self.is_cancelled(today)
 
-    def get_state(self) -> int:
+    def get_state(self, today: typing.Optional[datetime.date] = None) -> int:
         if self.payed:
             return constants.PAYED
         elif self.promise:
             return constants.PROMISE
-        elif self.is_cancelled():
-            return constants.CANCELED
-        elif self.is_overdue():
-            return constants.OVERDUE
-        else:
-            return constants.ACTIVE
+        return get_date_state(self.get_due_date(), self.get_cancel_date(),
+                              datetime.date.today() if today is None else today)
+
+
+DateOrOrdinal = typing.Union[datetime.date, int]
+
+
+def get_date_state(due_date: DateOrOrdinal, cancel_date: DateOrOrdinal, today: DateOrOrdinal) -> int:
+    if cancel_date <= today:
+        return constants.CANCELED
+    elif due_date < today:
+        return constants.OVERDUE
+    return constants.ACTIVE
+
+
+class StateClassifier:
+    CACHE_SIZE = 4096
+
+    def __init__(self, clock: typing.Callable[[], datetime.date] = datetime.date.today, cache_size: int = CACHE_SIZE):
+        self.clock = clock
+        self.cache_size = cache_size
+        self.today: typing.Optional[datetime.date] = None
+        self.date_states: typing.Dict[typing.Tuple[datetime.date, int], int] = {}
+
+    def get_today(self) -> datetime.date:
+        today = self.clock()
+        if today != self.today:
+            self.today = today
+            self.date_states.clear()
+        return today
+
+    def get_date_state(self, agreement_: Agreement) -> int:
+        key = (agreement_.create_date, agreement_.d_plus)
+        state = self.date_states.get(key)
+        if state is None:
+            state = get_date_state(agreement_.get_due_date(), agreement_.get_cancel_date(), self.today)
+            if len(self.date_states) >= self.cache_size:
+                self.date_states.clear()
+            self.date_states[key] = state
+        return state
+
+    def iter_states(self, agreements: typing.Iterable[Agreement]) -> typing.Iterator[typing.Tuple[Agreement, int]]:
+        self.get_today()
+        for agreement_ in agreements:
+            if agreement_.payed:
+                yield agreement_, constants.PAYED
+            elif agreement_.promise:
+                yield agreement_, constants.PROMISE
+            else:
+                yield agreement_, self.get_date_state(agreement_)
+
+    def classify(self, agreements: typing.Iterable[Agreement]) -> typing.List[int]:
+        return [state for _, state in self.iter_states(agreements)]
+
+
+class AgreementStatistics:
+    def __init__(self, counts: typing.Optional[typing.Dict[int, int]] = None,
+                 sums: typing.Optional[typing.Dict[int, float]] = None):
+        self.counts = dict.fromkeys(constants.AGREEMENT_STATES, 0)
+        self.sums = dict.fromkeys(constants.AGREEMENT_STATES, 0.0)
+        self.counts.update(counts or {})
+        self.sums.update(sums or {})
+
+    def get_count(self, state: typing.Optional[int] = None) -> int:
+        return sum(self.counts.values()) if state is None else self.counts[state]
+
+    def get_sum(self, state: typing.Optional[int] = None) -> float:
+        return sum(self.sums.values()) if state is None else self.sums[state]
+
+    def add(self, state: int, value: float):
+        self.counts[state] += 1
+        self.sums[state] += value
+
+    def remove(self, state: int, value: float):
+        self.counts[state] -= 1
+        self.sums[state] -= value
+
+    def copy(self) -> "AgreementStatistics":
+        return AgreementStatistics(self.counts, self.sums)
+
+
+class AgreementRollup:
+    __slots__ = ("start", "negotiated_count", "negotiated_sum", "payed_count", "payed_sum", "promise_count",
+                 "promise_sum", "cancel_count", "cancel_sum")
+
+    def __init__(self, start: typing.Optional[datetime.date] = None, negotiated_count: int = 0,
+                 negotiated_sum: float = 0.0, payed_count: int = 0, payed_sum: float = 0.0, promise_count: int = 0,
+                 promise_sum: float = 0.0, cancel_count: int = 0, cancel_sum: float = 0.0):
+        self.start = start
+        self.negotiated_count = negotiated_count
+        self.negotiated_sum = negotiated_sum
+        self.payed_count = payed_count
+        self.payed_sum = payed_sum
+        self.promise_count = promise_count
+        self.promise_sum = promise_sum
+        self.cancel_count = cancel_count
+        self.cancel_sum = cancel_sum
+
+
+def get_bucket_start(date: datetime.date, granularity: int) -> datetime.date:
+    if granularity == constants.WEEKLY:
+        return date - datetime.timedelta(days=date.weekday())
+    elif granularity == constants.MONTHLY:
+        return date.replace(day=1)
+    return date
+
+
+def get_bucket_end(date: datetime.date, granularity: int) -> datetime.date:
+    if granularity == constants.WEEKLY:
+        return get_bucket_start(date, granularity) + datetime.timedelta(days=6)
+    elif granularity == constants.MONTHLY:
+        return date.replace(day=calendar.monthrange(date.year, date.month)[1])
+    return date
+
 
+def shift_bucket(date: datetime.date, granularity: int, buckets: int) -> datetime.date:
+    start = get_bucket_start(date, granularity)
+    if granularity == constants.WEEKLY:
+        return start + datetime.timedelta(weeks=buckets)
+    elif granularity == constants.MONTHLY:
+        year, month = divmod(start.year * 12 + start.month - 1 + buckets, 12)
+        return datetime.date(year, month + 1, 1)
+    return start + datetime.timedelta(days=buckets)
@@ -0,0 +1,87 @@
+import argparse
+import datetime
+import locale
+import os
+import random
+import re
+import sys
+import time
+import typing
+
+if not __package__:
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common import codec
+
+
+def legacy_format_cpf(cpf: str, pretty: bool = True) -> str:
+    compiled = re.compile(r"(\d{3})\.?(\d{3})\.?(\d{3})-?(\d{2})")
+    if pretty:
+        return compiled.sub(r"\1.\2.\3-\4", cpf)
+    else:
+        return compiled.sub(r"\1\2\3\4", cpf)
+
+
+def legacy_format_brl(brl: float, symbol: bool = True) -> str:
+    return locale.currency(brl, symbol, True)
+
+
+def legacy_brl_to_float(brl: str) -> float:
+    return float(brl.replace(".", "").replace(",", ".").replace("R$ ", ""))
+
+
+def legacy_format_date(date: datetime.date) -> str:
+    return date.strftime("%d/%m/%Y")
+
+
+def legacy_parse_date(date_str: str) -> datetime.date:
+    return datetime.datetime.strptime(date_str, "%d/%m/%Y").date()
+
+
+def measure(function: typing.Callable[[typing.Any], typing.Any], values: typing.Sequence, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for value in values:
+            function(value)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.codec",
+                                     description="Compara o codec com as funções de formater e converter.")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=3)
+    arguments = parser.parse_args()
+    generator = random.Random(0)
+    today = datetime.date.today()
+    values = [generator.randint(100, 5000000) / 100 for _ in range(arguments.rows)]
+    cpfs = [f"{generator.randint(0, 99999999999):011d}" for _ in range(arguments.rows)]
+    dates = [today - datetime.timedelta(days=generator.randint(0, 365)) for _ in range(arguments.rows)]
+    brls = codec.format_brls(values)
+    date_texts = codec.format_dates(dates)
+    try:
+        locale.setlocale(locale.LC_MONETARY, "pt_BR.UTF-8")
+    except locale.Error:
+        print("Locale pt_BR.UTF-8 indisponível, format_brl legado ignorado.")
+        legacy_brl = None
+    else:
+        legacy_brl = legacy_format_brl
+    cases = (("format_brl", legacy_brl, codec.format_brl, values),
+             ("parse_brl", legacy_brl_to_float, codec.parse_brl, brls),
+             ("format_cpf", legacy_format_cpf, codec.format_cpf, cpfs),
+             ("format_date", legacy_format_date, codec.format_date, dates),
+             ("parse_date", legacy_parse_date, codec.parse_date, date_texts))
+    for name, legacy, current, sample in cases:
+        current_seconds = measure(current, sample, arguments.repeat)
+        if legacy is None:
+            print(f"{name:>12}: codec {current_seconds:.3f}s")
+            continue
+        legacy_seconds = measure(legacy, sample, arguments.repeat)
+        print(f"{name:>12}: legado {legacy_seconds:.3f}s, codec {current_seconds:.3f}s "
+              f"({legacy_seconds / current_seconds:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+import argparse
+import datetime
+import os
+import random
+import sys
+import time
+import typing
+
+if not __package__:
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import exception_proposal as ep
+from common import constants, converter, regex
+
+
+def get_statement(lines: int, seed: int = 0) -> str:
+    generator = random.Random(seed)
+    products = ("CBRCREL", "CCRCFI", "EPCFI")
+    return "\n".join(
+        f"{index:06d} {generator.choice(products)} venc. {generator.randint(1, 28):02d}/"
+        f"{generator.randint(1, 12):02d}/{generator.randint(2015, 2024)} "
+        f"R$ {generator.randint(1, 99999):,},{generator.randint(0, 99):02d}".replace(",", ".", 1)
+        for index in range(lines))
+
+
+REGRESSIONS = (
+    ("CCRCFI 11/02/2023 R$ 99,00 (juros R$ 3,00)\nEPCFI\n12/03/2023 R$ 10,00",
+     [(constants.CCRCFI, 99.0, datetime.date(2023, 2, 11)), (constants.EPCFI, 10.0, datetime.date(2023, 3, 12))]),
+)
+
+
+def check_regressions():
+    for text, expected in REGRESSIONS:
+        debits = [(debit.product, debit.value, debit.due_date) for debit in ep.get_debits_from_text(text)]
+        assert debits == expected, f"{text!r}: {debits} != {expected}"
+
+
+def get_debits_with_findall(text: str) -> typing.List[ep.Debit]:
+    debits = []
+    for value, product, due_date in zip(regex.BRL.findall(text), regex.PRODUCT.findall(text), regex.DATE.findall(text)):
+        debits.append(ep.Debit(product, converter.brl_to_float(value), converter.parse_date(due_date)))
+    return debits
+
+
+def measure(function: typing.Callable[[str], typing.List[ep.Debit]], text: str, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.debits",
+                                     description="Compara os analisadores de extratos de débitos.")
+    parser.add_argument("--lines", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=3)
+    arguments = parser.parse_args()
+    check_regressions()
+    text = get_statement(arguments.lines)
+    print(f"{len(text) / 1024 / 1024:.1f} MiB, {arguments.lines} linhas")
+    for name, function in (("findall + zip", get_debits_with_findall), ("streaming", ep.get_debits_from_text)):
+        seconds = measure(function, text, arguments.repeat)
+        print(f"{name:>14}: {seconds:.3f}s ({arguments.lines / seconds:.0f} débitos/s)")
+
+
+if __name__ == '__main__':
+    main()
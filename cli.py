@@ -0,0 +1,209 @@
+import argparse
+import datetime
+import sys
+import typing
+
+import agreement
+import database
+import exception_proposal as ep
+import exporter
+import importer
+from common import codec, config, constants
+
+
+def row_to_proposal(row: dict) -> typing.Union[ep.Proposal, ep.InstallmentProposal]:
+    first = importer.parse_brl(row["first"])
+    due_date = importer.parse_date(row["due_date"])
+    installments = int(row.get("installments") or 1)
+    if installments > 1:
+        return ep.InstallmentProposal(installments, first, importer.parse_brl(row["rest"]), due_date)
+    return ep.Proposal(first, due_date)
+
+
+def row_to_exception_proposal(row: dict) -> ep.ExceptionProposal:
+    return ep.ExceptionProposal(importer.parse_cpf(row["cpf"]), importer.parse_brl(row["main_value"]),
+                                importer.parse_brl(row["promotion"]), row_to_proposal(row), row.get("email", ""),
+                                int(row["delayed"]), row["product"], row.get("phone", ""))
+
+
+def write_texts(texts: typing.Iterable[str], output: typing.TextIO, separator: str) -> int:
+    count = 0
+    for text in texts:
+        if count:
+            output.write(separator)
+        output.write(text)
+        count += 1
+    if count:
+        output.write("\n")
+    return count
+
+
+def on_agreement_texts(database_: database.DataBase, arguments: argparse.Namespace) -> int:
+    def get_texts():
+        for row in importer.read_rows(arguments.path):
+            proposal = row_to_proposal(row)
+            if arguments.save:
+                database_.add_agreement(proposal.to_agreement(importer.parse_cpf(row["cpf"])))
+            yield proposal.get_formatted_to_register(row["product"])
+
+    with database_.transaction():
+        count = write_texts(get_texts(), arguments.output, "\n")
+    print(f"{count} textos de acordo gerados.", file=sys.stderr)
+    return 0
+
+
+def on_exception_proposal_texts(database_: database.DataBase, arguments: argparse.Namespace) -> int:
+    def get_texts():
+        for row in importer.read_rows(arguments.path):
+            exception_proposal = row_to_exception_proposal(row)
+            if arguments.save:
+                database_.add_exception_proposal(exception_proposal.to_exception_proposal_sent())
+            yield exception_proposal.get_text_to_copy()
+
+    with database_.transaction():
+        count = write_texts(get_texts(), arguments.output, "\n\n")
+    print(f"{count} textos de proposta de exceção gerados.", file=sys.stderr)
+    return 0
+
+
+def on_import(database_: database.DataBase, arguments: argparse.Namespace) -> int:
+    report = importer.import_file(database_, arguments.path, arguments.kind)
+    print(f"{report.rows} registros importados ({report.get_rows_per_second():.0f} registros/s).")
+    return 0
+
+
+def on_export(database_: database.DataBase, arguments: argparse.Namespace) -> int:
+    state = constants.STATES.index(arguments.state) - 1 if arguments.state else None
+    report = exporter.export_file(database_, arguments.path, arguments.kind,
+                                  lambda rows: print(f"{rows} registros exportados...", file=sys.stderr),
+                                  state, arguments.cpf, arguments.start, arguments.end)
+    print(f"{report.rows} registros exportados ({report.get_rows_per_second():.0f} registros/s).")
+    return 0
+
+
+def set_agreements(database_: database.DataBase, ids: typing.Iterable[int],
+                   setter: typing.Callable[[database.DataBase, int], int], label: str) -> int:
+    updated = 0
+    missing = []
+    with database_.transaction():
+        for id_ in ids:
+            rowcount = setter(database_, id_)
+            updated += rowcount
+            if not rowcount:
+                missing.append(id_)
+    print(f"{updated} acordos definidos como {label}.")
+    if missing:
+        print(f"Acordos não encontrados: {', '.join(map(str, missing))}.", file=sys.stderr)
+        return 1
+    return 0
+
+
+def on_pay(database_: database.DataBase, arguments: argparse.Namespace) -> int:
+    return set_agreements(database_, arguments.ids, database.DataBase.set_agreement_as_payed, "pagos")
+
+
+def on_promise(database_: database.DataBase, arguments: argparse.Namespace) -> int:
+    return set_agreements(database_, arguments.ids, database.DataBase.set_agreement_as_promise, "promessa")
+
+
+def on_report(database_: database.DataBase, arguments: argparse.Namespace) -> int:
+    statistics = database_.get_agreement_statistics(arguments.start, arguments.end)
+    print(f"{'Estado':<10} {'Acordos':>8} {'Total':>18}")
+    for state in constants.AGREEMENT_STATES:
+        print(f"{constants.STATES[state + 1]:<10} {statistics.get_count(state):>8} "
+              f"{codec.format_brl(statistics.get_sum(state)):>18}")
+    print(f"{'Total':<10} {statistics.get_count():>8} {codec.format_brl(statistics.get_sum()):>18}")
+    return 0
+
+
+def on_trend(database_: database.DataBase, arguments: argparse.Namespace) -> int:
+    granularity = constants.GRANULARITIES.index(arguments.granularity)
+    end = arguments.end or datetime.date.today()
+    start = arguments.start or agreement.shift_bucket(end, granularity, 1 - config.TREND_BUCKETS)
+    print(f"{'Período':<10} {'Negociados':>10} {'Total':>18} {'Pagos':>8} {'Total':>18} {'Cancelados':>10} "
+          f"{'Total':>18}")
+    for rollup in database_.get_agreement_trend(granularity, start, end):
+        print(f"{codec.format_date(rollup.start):<10} {rollup.negotiated_count:>10} "
+              f"{codec.format_brl(rollup.negotiated_sum):>18} {rollup.payed_count:>8} "
+              f"{codec.format_brl(rollup.payed_sum):>18} {rollup.cancel_count:>10} "
+              f"{codec.format_brl(rollup.cancel_sum):>18}")
+    return 0
+
+
+def on_purge(database_: database.DataBase, arguments: argparse.Namespace) -> int:
+    removed = database_.delete_old_historic(arguments.days, arguments.archive)
+    print(f"{removed} propostas de exceção removidas.")
+    if arguments.convert:
+        if database_.has_incremental_vacuum():
+            print("O banco de dados já usa vácuo incremental.")
+        else:
+            database_.enable_incremental_vacuum()
+            print("Banco de dados convertido para vácuo incremental.")
+    return 0
+
+
+def get_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="easy_service", description="Atendimento fácil sem interface gráfica.")
+    parser.add_argument("--database", default="database.db", help="caminho do banco de dados")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    texts = subparsers.add_parser("textos", help="gera textos a partir de um arquivo CSV ou JSON")
+    texts_subparsers = texts.add_subparsers(dest="kind", required=True)
+    for name, handler in (("acordos", on_agreement_texts), ("propostas", on_exception_proposal_texts)):
+        subparser = texts_subparsers.add_parser(name)
+        subparser.add_argument("path")
+        subparser.add_argument("--output", type=argparse.FileType("w", encoding="utf-8"), default=sys.stdout)
+        subparser.add_argument("--save", action="store_true", help="também salva os registros no banco de dados")
+        subparser.set_defaults(handler=handler)
+
+    import_ = subparsers.add_parser("importar", help="importa acordos ou propostas de exceção")
+    import_.add_argument("kind", choices=(importer.AGREEMENTS, importer.EXCEPTION_PROPOSALS))
+    import_.add_argument("path")
+    import_.set_defaults(handler=on_import)
+
+    export = subparsers.add_parser("exportar", help="exporta acordos ou propostas de exceção para CSV ou XLSX")
+    export.add_argument("kind", choices=(importer.AGREEMENTS, importer.EXCEPTION_PROPOSALS))
+    export.add_argument("path", help="arquivo de saída, .csv ou .xlsx")
+    export.add_argument("--state", choices=constants.STATES[1:])
+    export.add_argument("--cpf")
+    export.add_argument("--start", type=datetime.date.fromisoformat)
+    export.add_argument("--end", type=datetime.date.fromisoformat)
+    export.set_defaults(handler=on_export)
+
+    for name, handler in (("pagar", on_pay), ("prometer", on_promise)):
+        subparser = subparsers.add_parser(name, help=f"altera o estado de acordos pelo id ({name})")
+        subparser.add_argument("ids", type=int, nargs="+")
+        subparser.set_defaults(handler=handler)
+
+    report = subparsers.add_parser("relatorio", help="estatísticas dos acordos por estado")
+    report.add_argument("--start", type=datetime.date.fromisoformat)
+    report.add_argument("--end", type=datetime.date.fromisoformat)
+    report.set_defaults(handler=on_report)
+
+    trend = subparsers.add_parser("tendencia", help="acordos negociados, pagos e cancelados por período")
+    trend.add_argument("--granularity", choices=constants.GRANULARITIES,
+                       default=constants.GRANULARITIES[constants.DAILY])
+    trend.add_argument("--start", type=datetime.date.fromisoformat)
+    trend.add_argument("--end", type=datetime.date.fromisoformat)
+    trend.set_defaults(handler=on_trend)
+
+    purge = subparsers.add_parser("limpar", help="remove propostas de exceção antigas")
+    purge.add_argument("--days", type=int, default=config.EXCEPTION_PROPOSALS_RETENTION_DAYS)
+    purge.add_argument("--archive", action="store_true", default=config.ARCHIVE_OLD_EXCEPTION_PROPOSALS)
+    purge.add_argument("--converter", dest="convert", action="store_true",
+                       help="converte o banco de dados para vácuo incremental (executa um VACUUM completo)")
+    purge.set_defaults(handler=on_purge)
+    return parser
+
+
+def main(argv: typing.Optional[typing.Sequence[str]] = None) -> int:
+    arguments = get_parser().parse_args(argv)
+    database_ = database.DataBase(arguments.database)
+    try:
+        return arguments.handler(database_, arguments)
+    finally:
+        database_.sqlite_connection.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,73 @@
+import datetime
+import functools
+import re
+import typing
+
+CPF = re.compile(r"(\d{3})\.?(\d{3})\.?(\d{3})-?(\d{2})")
+PHONE = re.compile(r"^\(?(\d{2})\)?\s{0,2}(9?)\s?(\d{4})[\s-]?(\d{4})$")
+NON_DIGIT = re.compile(r"\D")
+CACHE_SIZE = 4096
+
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def format_brl(value: float, symbol: bool = True) -> str:
+    integer, cents = f"{abs(value):.2f}".split(".")
+    text = f"{int(integer):,}".replace(",", ".") + "," + cents
+    if symbol:
+        text = "R$ " + text
+    return "-" + text if value < 0 else text
+
+
+def parse_brl(text: str) -> float:
+    return float(text.replace("R$", "").replace(".", "").replace(",", "."))
+
+
+def format_cpf(cpf: str, pretty: bool = True) -> str:
+    if len(cpf) == 11 and cpf.isdigit():
+        return f"{cpf[:3]}.{cpf[3:6]}.{cpf[6:9]}-{cpf[9:]}" if pretty else cpf
+    return CPF.sub(r"\1.\2.\3-\4" if pretty else r"\1\2\3\4", cpf)
+
+
+def format_phone(phone: str) -> str:
+    return PHONE.sub(r"(\1) \2\3-\4", phone)
+
+
+def only_digits(text: str) -> str:
+    return NON_DIGIT.sub("", text)
+
+
+def cpf_to_int(cpf: str) -> int:
+    return int(only_digits(cpf))
+
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def format_date(date: datetime.date) -> str:
+    return f"{date.day:02d}/{date.month:02d}/{date.year:04d}"
+
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def parse_date(text: str) -> datetime.date:
+    if len(text) == 10 and text[2] == text[5] == "/" and text[:2].isdigit() and text[3:5].isdigit() \
+            and text[6:].isdigit():
+        return datetime.date(int(text[6:]), int(text[3:5]), int(text[:2]))
+    return datetime.datetime.strptime(text, "%d/%m/%Y").date()
+
+
+def format_brls(values: typing.Iterable[float], symbol: bool = True) -> typing.List[str]:
+    return [format_brl(value, symbol) for value in values]
+
+
+def parse_brls(texts: typing.Iterable[str]) -> typing.List[float]:
+    return list(map(parse_brl, texts))
+
+
+def format_cpfs(cpfs: typing.Iterable[str], pretty: bool = True) -> typing.List[str]:
+    return [format_cpf(cpf, pretty) for cpf in cpfs]
+
+
+def format_dates(dates: typing.Iterable[datetime.date]) -> typing.List[str]:
+    return list(map(format_date, dates))
+
+
+def parse_dates(texts: typing.Iterable[str]) -> typing.List[datetime.date]:
+    return list(map(parse_date, texts))
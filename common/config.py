@@ -1,3 +1,15 @@
 VERSION = "1.0.4"
 MIN_RESOLUTION = (640, 480)
 START_RESOLUTION = (800, 600)
+EXCEPTION_PROPOSALS_RETENTION_DAYS = 31
+ARCHIVE_OLD_EXCEPTION_PROPOSALS = False
+RETENTION_INTERVAL = 6 * 60 * 60
+RETENTION_RETRY_INTERVAL = 5 * 60
+VACUUM_PAGES_PER_STEP = 256
+CPF_FILTER_DELAY = 250
+PREFETCH_DELAY = 200
+STARTUP_TIMING_LOG = "startup.log"
+MIN_INSTALLMENT_VALUE = 50.0
+PLAN_ENTRY_RATIOS = (0.1, 0.2, 0.3, 0.5)
+PLAN_SUGGESTIONS = 4
+TREND_BUCKETS = 12
@@ -18,6 +18,12 @@ PROMISE = 1
 CANCELED = 2
 OVERDUE = 3
 ACTIVE = 4
+AGREEMENT_STATES = (PAYED, PROMISE, CANCELED, OVERDUE, ACTIVE)
+
+DAILY = 0
+WEEKLY = 1
+MONTHLY = 2
+GRANULARITIES = ("Diário", "Semanal", "Mensal")
 
 CANCEL_IN_DAYS = 10
 
@@ -1,8 +1,10 @@
 import datetime
 
+from common import codec
+
 
 def brl_to_float(brl: str) -> float:
-    return float(brl.replace(".", "").replace(",", ".").replace("R$ ", ""))
+    return codec.parse_brl(brl)
 
 
 def bool_to_str(condition: bool) -> str:
@@ -14,4 +16,12 @@ def str_to_bool(condition: str) -> bool:
 
 
 def parse_date(date_str: str) -> datetime.date:
-    return datetime.datetime.strptime(date_str, "%d/%m/%Y").date()
+    return codec.parse_date(date_str)
+
+
+def only_digits(text: str) -> str:
+    return codec.only_digits(text)
+
+
+def cpf_to_int(cpf: str) -> int:
+    return codec.cpf_to_int(cpf)
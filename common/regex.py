@@ -8,3 +8,5 @@ BRL = re.compile(r"(?:R\$ {0,3})?[1-9]\d{0,2}(?:\.?\d{3})*,\d{2}", re.I)
 EMAIL = re.compile(r"([A-Za-z0-9]+[.-_])*[A-Za-z0-9]+@[A-Za-z0-9-]+(\.[A-Z|a-z]{2,})+", re.I)
 PRODUCT = re.compile(r"(?P<CBR>cbr(?:crel)?)|(?P<CCR>ccr(?:cfi)?)|(?P<EP>ep(?:cfi)?)", re.I)
 DATE = re.compile(r"(?:3[01]|[0-2]\d)/(?:0[1-9]|1[0-2])/\d{4}")
+DEBIT_FIELD = re.compile(rf"(?P<line>\n)|\b(?=[\dRCE])(?:(?:{PRODUCT.pattern})\b|(?P<date>{DATE.pattern})|"
+                         rf"(?P<value>{BRL.pattern}))", re.I)
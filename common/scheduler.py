@@ -0,0 +1,78 @@
+import tkinter as tk
+import typing
+
+
+class Timer:
+    def __init__(self, scheduler: "Scheduler", callback: typing.Callable[[], typing.Any], slot: int, rounds: int,
+                 key: typing.Optional[typing.Hashable] = None):
+        self.scheduler = scheduler
+        self.callback = callback
+        self.slot = slot
+        self.rounds = rounds
+        self.key = key
+        self.active = True
+
+    def cancel(self):
+        self.scheduler.cancel_timer(self)
+
+
+class Scheduler:
+    def __init__(self, master: tk.Misc, resolution: int = 50, size: int = 64):
+        self.master = master
+        self.resolution = resolution
+        self.wheel: typing.List[typing.List[Timer]] = [[] for _ in range(size)]
+        self.position = 0
+        self.pending = 0
+        self.keyed_timers: typing.Dict[typing.Hashable, Timer] = {}
+        self.tick_id: typing.Optional[str] = None
+
+    def schedule(self, delay: int, callback: typing.Callable[[], typing.Any],
+                 key: typing.Optional[typing.Hashable] = None) -> Timer:
+        if key is not None:
+            self.cancel(key)
+        ticks = max(1, -(-delay // self.resolution))
+        slot = (self.position + ticks) % len(self.wheel)
+        timer = Timer(self, callback, slot, (ticks - 1) // len(self.wheel), key)
+        self.wheel[slot].append(timer)
+        if key is not None:
+            self.keyed_timers[key] = timer
+        self.pending += 1
+        if self.tick_id is None:
+            self.tick_id = self.master.after(self.resolution, self.tick)
+        return timer
+
+    def cancel(self, key: typing.Hashable):
+        timer = self.keyed_timers.get(key)
+        if timer is not None:
+            self.cancel_timer(timer)
+
+    def cancel_timer(self, timer: Timer):
+        if not timer.active:
+            return
+        self.discard(timer)
+        self.wheel[timer.slot].remove(timer)
+        if not self.pending and self.tick_id is not None:
+            self.master.after_cancel(self.tick_id)
+            self.tick_id = None
+
+    def discard(self, timer: Timer):
+        timer.active = False
+        self.pending -= 1
+        if timer.key is not None and self.keyed_timers.get(timer.key) is timer:
+            del self.keyed_timers[timer.key]
+
+    def tick(self):
+        self.position = (self.position + 1) % len(self.wheel)
+        slot = self.wheel[self.position]
+        due = [timer for timer in slot if not timer.rounds]
+        for timer in slot:
+            timer.rounds -= 1
+        slot[:] = [timer for timer in slot if timer.rounds >= 0]
+        for timer in due:
+            self.discard(timer)
+        self.tick_id = self.master.after(self.resolution, self.tick) if self.pending else None
+        for timer in due:
+            try:
+                timer.callback()
+            except Exception as exception:
+                self.master.report_callback_exception(type(exception), exception, exception.__traceback__)
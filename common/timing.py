@@ -0,0 +1,26 @@
+import logging
+import os
+import sys
+import time
+
+from common import config
+
+STARTED = time.perf_counter()
+ENABLED = "--startup-timing" in sys.argv or bool(os.environ.get("EASY_SERVICE_STARTUP_TIMING"))
+
+logger = logging.getLogger(__name__)
+
+if ENABLED:
+    logging.basicConfig(filename=config.STARTUP_TIMING_LOG, level=logging.INFO,
+                        format="%(asctime)s %(name)s %(message)s")
+
+
+def elapsed() -> float:
+    return time.perf_counter() - STARTED
+
+
+def mark(stage: str) -> float:
+    seconds = elapsed()
+    if ENABLED:
+        logger.info("%s: %.3fs", stage, seconds)
+    return seconds
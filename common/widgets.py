@@ -1,15 +1,11 @@
-from common import utils, colors
+from common import utils, colors, scheduler
 from tkinter import ttk
 
-import locale
-import threading
+import abc
 import tkinter as tk
 import typing
 
 
-locale.setlocale(locale.LC_MONETARY, 'pt_BR.UTF-8')
-
-
 def _strip_content(event):
     control_v_content = utils.get_clipboard_content(event.widget)
     control_v_content = control_v_content.strip()
@@ -43,29 +39,30 @@ class TreeviewContextMenuManagement:
 
 
 class HoverText:
-    def __init__(self, widget, hover_text: typing.Optional[str] = None):
+    PLACE_DELAY = 2000
+    HIDE_DELAY = 3000
+
+    def __init__(self, widget, scheduler_: scheduler.Scheduler, hover_text: typing.Optional[str] = None):
         self.widget = widget
+        self.scheduler = scheduler_
         self.hover_text = hover_text
         toplevel = self.widget.winfo_toplevel()
         self.label = tk.Label(toplevel, highlightthickness=1, highlightbackground=colors.HIGHLIGHT)
         if self.hover_text:
             self.label.config(text=self.hover_text)
-        self.place_timer: typing.Optional[threading.Timer] = None
         self.widget.bind("<Enter>", lambda _: self.on_enter())
         self.widget.bind("<Leave>", lambda _: self.on_leave())
 
     def on_enter(self):
         if self.hover_text:
-            self.place_timer = threading.Timer(2, self.routine)
-            self.place_timer.start()
+            self.scheduler.schedule(self.PLACE_DELAY, self.routine, key=self)
 
     def routine(self):
         toplevel = self.widget.winfo_toplevel()
         coord_x = toplevel.winfo_pointerx() - toplevel.winfo_rootx()
         coord_y = toplevel.winfo_pointery() - toplevel.winfo_rooty() - 32
         self.place_hidden_text(coord_x, coord_y)
-        timer = threading.Timer(3, self.hide_hidden_text)
-        timer.start()
+        self.scheduler.schedule(self.HIDE_DELAY, self.hide_hidden_text, key=self)
 
     def place_hidden_text(self, x: int, y: int):
         self.label.place(x=x, y=y)
@@ -79,15 +76,13 @@ class HoverText:
     def on_leave(self):
         if self.is_hidden_text_visible():
             self.hide_hidden_text()
-        if self.place_timer is not None:
-            self.place_timer.cancel()
-            self.place_timer = None
+        self.scheduler.cancel(self)
 
 
 class Button(ttk.Button):
-    def __init__(self, master, hover_text: typing.Optional[str] = None, **kwargs):
+    def __init__(self, master, scheduler_: scheduler.Scheduler, hover_text: typing.Optional[str] = None, **kwargs):
         super().__init__(master, **kwargs)
-        HoverText(self, hover_text)
+        HoverText(self, scheduler_, hover_text)
 
 
 class Treeview(ttk.Treeview):
@@ -139,6 +134,216 @@ class Treeview(ttk.Treeview):
         self._binds[sequence] = func
 
 
+Row = typing.Tuple[str, typing.Any]
+PageLoader = typing.Callable[[int, int, typing.Optional[typing.Any], typing.Optional[typing.Any],
+                              typing.Callable[[typing.List[Row]], typing.Any]], typing.Any]
+
+
+class VirtualTreeview(Treeview, metaclass=abc.ABCMeta):
+    VIRTUAL_WINDOW = 100
+    PAGE_SIZE = 100
+    CACHED_PAGES = 10
+    PLACEHOLDER = "#"
+
+    def __init__(self, *args, **kwargs):
+        self.total = 0
+        self.pages: typing.Dict[int, typing.List[Row]] = {}
+        self.fresh: typing.Set[int] = set()
+        self.requested: typing.Set[int] = set()
+        self.rows: typing.Dict[str, typing.Any] = {}
+        self.generation = 0
+        self.loader: typing.Optional[PageLoader] = None
+        self.rendered_values: typing.Dict[str, tuple] = {}
+        self.window_start = 0
+        self.visible_rows = 20
+        self._yscrollcommand = kwargs.pop("yscrollcommand", None)
+        super(VirtualTreeview, self).__init__(*args, **kwargs)
+        super(VirtualTreeview, self).configure(yscrollcommand=self._on_native_scroll)
+
+    def configure(self, cnf=None, **kwargs):
+        if "yscrollcommand" in kwargs:
+            self._yscrollcommand = kwargs.pop("yscrollcommand")
+            if cnf is None and not kwargs:
+                return None
+        return super(VirtualTreeview, self).configure(cnf, **kwargs)
+
+    config = configure
+
+    @abc.abstractmethod
+    def get_values(self, key: str) -> tuple:
+        pass
+
+    def get_window_size(self) -> int:
+        return max(self.VIRTUAL_WINDOW, 5 * self.visible_rows)
+
+    def set_source(self, total: int, loader: PageLoader):
+        self.loader = loader
+        self.total = total
+        self._invalidate()
+        self.window_start = max(0, min(self.window_start, self.total - self.get_window_size()))
+        self._render()
+
+    def _invalidate(self):
+        self.generation += 1
+        self.fresh.clear()
+        self.requested.clear()
+        last_page = (self.total - 1) // self.PAGE_SIZE
+        for page in [page for page in self.pages if page > last_page]:
+            self._drop_page(page)
+        self._index_rows()
+
+    def _index_rows(self):
+        self.rows = {key: row for rows in self.pages.values() for key, row in rows}
+
+    def get_row(self, key: str) -> typing.Any:
+        return self.rows[key]
+
+    def has_row(self, key: str) -> bool:
+        return key in self.rows
+
+    def selection(self) -> tuple:
+        return tuple(key for key in super(VirtualTreeview, self).selection() if key in self.rows)
+
+    def append_row(self, key: str, row: typing.Any):
+        page, index = divmod(self.total, self.PAGE_SIZE)
+        self.total += 1
+        if len(self.pages.get(page, ())) == index and (index or page == 0 or page - 1 in self.pages):
+            self.pages.setdefault(page, []).append((key, row))
+            self.rows[key] = row
+        self._render()
+
+    def refresh(self, *keys: str):
+        for key in keys:
+            if key in self.rendered_values and key in self.rows:
+                self._set_item_values(key, self.get_values(key))
+
+    def _set_item_values(self, key: str, values: tuple):
+        if self.rendered_values.get(key) != values:
+            self.rendered_values[key] = values
+            self.item(key, values=values)
+
+    def delete(self, *items: str):
+        removed = set(items)
+        super(VirtualTreeview, self).delete(*(item for item in items if self.exists(item)))
+        for item in items:
+            self.rendered_values.pop(item, None)
+        for page, rows in self.pages.items():
+            self.pages[page] = [(key, row) for key, row in rows if key not in removed]
+        self.total -= sum(item in self.rows for item in removed)
+        self._invalidate()
+        self._render()
+
+    def _request(self, pages: typing.Iterable[int]):
+        if self.loader is None:
+            return
+        for page in sorted(set(pages) - self.requested):
+            self.requested.add(page)
+            previous = self.pages.get(page - 1) if page - 1 in self.fresh else None
+            following = self.pages.get(page + 1) if page + 1 in self.fresh else None
+            after = previous[-1][1] if previous and len(previous) == self.PAGE_SIZE else None
+            before = following[0][1] if following and after is None else None
+            generation = self.generation
+            self.loader(page * self.PAGE_SIZE, self.PAGE_SIZE, after, before,
+                        lambda rows, page_=page: self._on_page(generation, page_, rows))
+
+    def _on_page(self, generation: int, page: int, rows: typing.List[Row]):
+        if generation != self.generation:
+            return
+        self.requested.discard(page)
+        self.pages[page] = rows
+        self.fresh.add(page)
+        if len(rows) < self.PAGE_SIZE and self.total > page * self.PAGE_SIZE + len(rows):
+            self.total = page * self.PAGE_SIZE + len(rows)
+            for stale in [stale for stale in self.pages if stale > page]:
+                self._drop_page(stale)
+        current = self.window_start // self.PAGE_SIZE
+        while len(self.pages) > self.CACHED_PAGES:
+            self._drop_page(max(self.pages, key=lambda cached: abs(cached - current)))
+        self._index_rows()
+        self._render(refresh=True)
+
+    def _drop_page(self, page: int):
+        del self.pages[page]
+        self.fresh.discard(page)
+
+    def yview(self, *args):
+        if args and args[0] == tk.MOVETO and self.total > len(self.get_children()):
+            self._scroll_to(round(float(args[1]) * self.total))
+            return None
+        return super(VirtualTreeview, self).yview(*args)
+
+    def _scroll_to(self, index: int):
+        window_size = self.get_window_size()
+        self.window_start = max(0, min(index - 2 * self.visible_rows, self.total - window_size))
+        self._render()
+        rendered = len(self.get_children())
+        if rendered:
+            self.yview_moveto((index - self.window_start) / rendered)
+
+    def _on_native_scroll(self, first: str, last: str):
+        rendered = len(self.get_children())
+        if rendered:
+            top = round(float(first) * rendered)
+            bottom = round(float(last) * rendered)
+            self.visible_rows = max(self.visible_rows, bottom - top)
+            near_start = top < self.visible_rows and self.window_start > 0
+            near_end = bottom > rendered - self.visible_rows and self.window_start + rendered < self.total
+            if near_start or near_end:
+                self._scroll_to(self.window_start + top)
+                return
+        if self._yscrollcommand is None:
+            return
+        elif rendered:
+            self._yscrollcommand((self.window_start + float(first) * rendered) / self.total,
+                                 (self.window_start + float(last) * rendered) / self.total)
+        else:
+            self._yscrollcommand(first, last)
+
+    def _get_window_keys(self) -> typing.Tuple[typing.List[str], typing.Set[int]]:
+        keys = []
+        seen = set()
+        missing = set()
+        for offset in range(self.window_start, min(self.window_start + self.get_window_size(), self.total)):
+            page, index = divmod(offset, self.PAGE_SIZE)
+            rows = self.pages.get(page, ())
+            key = rows[index][0] if index < len(rows) else None
+            if key is None or key in seen:
+                key = f"{self.PLACEHOLDER}{offset}"
+            seen.add(key)
+            keys.append(key)
+            if page not in self.fresh:
+                missing.add(page)
+        return keys, missing
+
+    def _render(self, refresh: bool = False):
+        keys, missing = self._get_window_keys()
+        wanted = set(keys)
+        stale = [key for key in self.get_children() if key not in wanted]
+        if stale:
+            super(VirtualTreeview, self).delete(*stale)
+            for key in stale:
+                self.rendered_values.pop(key, None)
+        current = self.get_children()
+        existing = set(current)
+        moved = set()
+        position = 0
+        for index, key in enumerate(keys):
+            while position < len(current) and current[position] in moved:
+                position += 1
+            if key not in existing:
+                self.rendered_values[key] = self.get_values(key) if key in self.rows else ()
+                self.insert("", index, iid=key, values=self.rendered_values[key])
+                continue
+            elif position < len(current) and current[position] == key:
+                position += 1
+            else:
+                self.move(key, "", index)
+                moved.add(key)
+            if refresh and key in self.rows:
+                self._set_item_values(key, self.get_values(key))
+        self._request(missing)
+
+
 class BrowseTreeview(Treeview):
     def __init__(self, *args, **kwargs):
         super(BrowseTreeview, self).__init__(*args, selectmode="none", **kwargs)
@@ -156,3 +361,7 @@ class BrowseTreeview(Treeview):
 
     def _on_row_click_release(self, event):
         pass
+
+
+class VirtualBrowseTreeview(BrowseTreeview, VirtualTreeview):
+    pass
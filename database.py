@@ -1,89 +1,402 @@
+import contextlib
+import re
 import sqlite3
 import datetime
 import typing
 
 import agreement
 import exception_proposal as ep
-from common import formater
+import migrations
+from common import config, constants, converter, formater
+
+AGREEMENT_COLUMNS = "cpf, value, create_date, d_plus, payed, promise, id"
+EXCEPTION_PROPOSAL_COLUMNS = "cpf, value, date, d_plus, counter_proposal, installments, id"
+STATE = f"""CASE
+WHEN payed THEN {constants.PAYED}
+WHEN promise THEN {constants.PROMISE}
+WHEN cancel_date <= :today THEN {constants.CANCELED}
+WHEN due_date < :today THEN {constants.OVERDUE}
+ELSE {constants.ACTIVE}
+END"""
+OPEN_STATE = f"""CASE
+WHEN cancel_date <= :today THEN {constants.CANCELED}
+WHEN due_date < :today THEN {constants.OVERDUE}
+ELSE {constants.ACTIVE}
+END"""
+STATE_CONDITIONS = {
+    constants.PAYED: "payed",
+    constants.PROMISE: "NOT payed AND promise",
+    constants.CANCELED: "NOT payed AND NOT promise AND cancel_date <= :today",
+    constants.OVERDUE: "NOT payed AND NOT promise AND due_date < :today AND cancel_date > :today",
+    constants.ACTIVE: "NOT payed AND NOT promise AND due_date >= :today AND cancel_date > :today"
+}
+INSERT_AGREEMENT = "INSERT INTO agreements (cpf, value, create_date, d_plus, payed, promise, due_date, " \
+                   "cancel_date, cpf_number) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?);"
+INSERT_EXCEPTION_PROPOSAL = "INSERT INTO exception_proposals (cpf, value, date, d_plus, counter_proposal, " \
+                            "installments, cpf_number) VALUES (?, ?, ?, ?, ?, ?, ?);"
+ROLLUP_COLUMNS = "CAST(total(negotiated_count) AS INTEGER), total(negotiated_sum), " \
+                 "CAST(total(payed_count) AS INTEGER), total(payed_sum), " \
+                 "CAST(total(promise_count) AS INTEGER), total(promise_sum), " \
+                 "CAST(total(cancel_count * (day <= :today)) AS INTEGER), total(cancel_sum * (day <= :today))"
+ROLLUP_BUCKETS = {constants.DAILY: "date(day)",
+                  constants.WEEKLY: "date(day, '-6 days', 'weekday 1')",
+                  constants.MONTHLY: "date(day, 'start of month')"}
+CPF_LENGTH = 11
+FETCH_SIZE = 512
+SORTING_COLUMNS = {"cpf": "cpf_number", "value": "value", "create_date": "create_date", "due_date": "due_date",
+                   "payed": "payed", "promise": "promise"}
+
+
+def _get_cpf_condition(cpf: typing.Optional[str], prefix: bool = False) -> typing.Tuple[typing.Optional[str], dict]:
+    digits = re.sub(r"\D", "", cpf) if cpf is not None else ""
+    if not digits or len(digits) > CPF_LENGTH:
+        return None, {}
+    elif len(digits) == CPF_LENGTH:
+        return "cpf_number = :cpf_number", {"cpf_number": int(digits)}
+    elif prefix:
+        scale = 10 ** (CPF_LENGTH - len(digits))
+        return "cpf_number >= :cpf_start AND cpf_number < :cpf_end", {"cpf_start": int(digits) * scale,
+                                                                     "cpf_end": (int(digits) + 1) * scale}
+    else:
+        return "instr(printf('%011d', cpf_number), :cpf) > 0", {"cpf": digits}
 
 
 class DataBase:
-    def __init__(self):
-        self.sqlite_connection = sqlite3.connect("database.db", detect_types=sqlite3.PARSE_DECLTYPES)
+    def __init__(self, path: str = "database.db"):
+        self.path = path
+        self.sqlite_connection = sqlite3.connect(path, detect_types=sqlite3.PARSE_DECLTYPES)
         self.cursor = self.sqlite_connection.cursor()
-        self.cursor.execute("""
-        CREATE TABLE IF NOT EXISTS exception_proposals (
-        cpf char(11) NOT NULL,
-        value DOUBLE(6, 2) NOT NULL,
-        date DATE NOT NULL,
-        d_plus BIT(5) NOT NULL,
-        counter_proposal DOUBLE(6, 2),
-        installments BIT(24),
-        id INTEGER PRIMARY KEY AUTOINCREMENT
-        )""")
-        self.cursor.execute("""
-        CREATE TABLE IF NOT EXISTS agreements (
-        cpf char(11) NOT NULL,
-        value DOUBLE(6, 2) NOT NULL,
-        create_date DATE NOT NULL,
-        d_plus BIT(3) NOT NULL,
-        payed bool NOT NULL,
-        promise bool NOT NULL,
-        id INTEGER PRIMARY KEY AUTOINCREMENT
-        )""")
-        self.sqlite_connection.commit()
+        self.transaction_depth = 0
+        self.statistics: typing.Optional[agreement.AgreementStatistics] = None
+        self.statistics_date: typing.Optional[datetime.date] = None
+        self.statistics_data_version: typing.Optional[int] = None
+        self.cursor.execute("PRAGMA auto_vacuum = INCREMENTAL;")
+        self.cursor.execute("PRAGMA journal_mode = WAL;")
+        self.cursor.execute("PRAGMA synchronous = NORMAL;")
+        self.cursor.execute("PRAGMA cache_size = -16000;")
+        self.cursor.execute("PRAGMA temp_store = MEMORY;")
+        self.migration_reports = migrations.migrate(self.sqlite_connection)
+
+    @contextlib.contextmanager
+    def transaction(self):
+        self.transaction_depth += 1
+        try:
+            yield self
+        except BaseException:
+            self.transaction_depth -= 1
+            if self.transaction_depth == 0:
+                self.sqlite_connection.rollback()
+                self.statistics = None
+            raise
+        else:
+            self.transaction_depth -= 1
+            self.commit()
+
+    def commit(self):
+        if self.transaction_depth == 0:
+            self.sqlite_connection.commit()
+
+    @staticmethod
+    def _get_exception_proposal_values(proposal: ep.ExceptionProposalSent) -> tuple:
+        return (formater.format_cpf(proposal.cpf, False), proposal.value, proposal.create_date, proposal.d_plus,
+                proposal.counter_proposal, proposal.installments, converter.cpf_to_int(proposal.cpf))
 
     def add_exception_proposal(self, proposal: ep.ExceptionProposalSent):
-        values = (formater.format_cpf(proposal.cpf, False), proposal.value, proposal.create_date, proposal.d_plus,
-                  proposal.counter_proposal, proposal.installments)
-        command = "INSERT INTO exception_proposals (cpf, value, date, d_plus, counter_proposal, installments) " \
-                  "VALUES (?, ?, ?, ?, ?, ?);"
-        self.cursor.execute(command, values)
-        self.sqlite_connection.commit()
+        self.cursor.execute(INSERT_EXCEPTION_PROPOSAL, self._get_exception_proposal_values(proposal))
+        self.commit()
         proposal.id = self.cursor.lastrowid
 
+    def add_exception_proposals(self, proposals: typing.Iterable[ep.ExceptionProposalSent]) -> int:
+        with self.transaction():
+            self.cursor.executemany(INSERT_EXCEPTION_PROPOSAL, map(self._get_exception_proposal_values, proposals))
+        return self.cursor.rowcount
+
+    def _iter_rows(self, command: str, parameters: typing.Union[tuple, dict] = (), chunk_size: int = FETCH_SIZE
+                   ) -> typing.Iterator[tuple]:
+        cursor = self.sqlite_connection.cursor()
+        try:
+            cursor.execute(command, parameters)
+            rows = cursor.fetchmany(chunk_size)
+            while rows:
+                yield from rows
+                rows = cursor.fetchmany(chunk_size)
+        finally:
+            cursor.close()
+
+    def iter_exception_proposals(self, cpf: typing.Optional[str] = None, cpf_prefix: bool = False,
+                                 chunk_size: int = FETCH_SIZE) -> typing.Iterator[ep.ExceptionProposalSent]:
+        cpf_condition, parameters = _get_cpf_condition(cpf, cpf_prefix)
+        command = f"SELECT {EXCEPTION_PROPOSAL_COLUMNS} FROM exception_proposals"
+        if cpf_condition is not None:
+            command += f" WHERE {cpf_condition}"
+        for values in self._iter_rows(command + ";", parameters, chunk_size):
+            yield ep.ExceptionProposalSent(*values)
+
     def get_exception_proposals_historic(self) -> typing.List[ep.ExceptionProposalSent]:
-        self.cursor.execute("SELECT * FROM exception_proposals;")
-        return [ep.ExceptionProposalSent(*values) for values in self.cursor.fetchall()]
-
-    def delete_old_historic(self):
-        self.cursor.execute("SELECT * FROM exception_proposals;")
-        for cpf, date in self.cursor.fetchall():
-            timedelta_ = datetime.datetime.now() - date
-            if timedelta_ > datetime.timedelta(days=31):
-                self.cursor.execute("DELETE FROM exception_proposals WHERE cpf=?;", (cpf,))
+        return list(self.iter_exception_proposals())
+
+    def count_exception_proposals(self) -> int:
+        return self.cursor.execute("SELECT count(*) FROM exception_proposals;").fetchone()[0]
+
+    def get_exception_proposals_page(self, offset: int = 0, limit: int = FETCH_SIZE,
+                                     after: typing.Optional[ep.ExceptionProposalSent] = None,
+                                     before: typing.Optional[ep.ExceptionProposalSent] = None
+                                     ) -> typing.List[ep.ExceptionProposalSent]:
+        rows = self._get_page_rows(EXCEPTION_PROPOSAL_COLUMNS, "exception_proposals", "", {}, None, False, offset,
+                                   limit, None if after is None else (None, after.id),
+                                   None if before is None else (None, before.id))
+        return [ep.ExceptionProposalSent(*values) for values in rows]
+
+    def _get_page_rows(self, columns: str, table: str, where: str, parameters: dict, sort_column: typing.Optional[str],
+                       reverse: bool, offset: int, limit: int, after: typing.Optional[tuple] = None,
+                       before: typing.Optional[tuple] = None) -> typing.List[tuple]:
+        backwards = after is None and before is not None
+        boundary = before if backwards else after
+        direction = "DESC" if reverse != backwards else "ASC"
+        if sort_column is None:
+            keyset, values, order = "id", ":key_id", f"id {direction}"
+        else:
+            keyset, values, order = f"({sort_column}, id)", "(:key_value, :key_id)", \
+                f"{sort_column} {direction}, id {direction}"
+        parameters = dict(parameters, limit=limit, offset=offset)
+        if boundary is None:
+            page = "LIMIT :limit OFFSET :offset"
+        else:
+            where += f"{' AND ' if where else ' WHERE '}{keyset} {'<' if direction == 'DESC' else '>'} {values}"
+            parameters.update(key_value=boundary[0], key_id=boundary[1])
+            page = "LIMIT :limit"
+        rows = self.cursor.execute(f"SELECT {columns} FROM {table}{where} ORDER BY {order} {page};",
+                                   parameters).fetchall()
+        return rows[::-1] if backwards else rows
+
+    def purge_exception_proposals(self, before: datetime.date, archive: bool = False) -> int:
+        with self.transaction():
+            if archive:
+                self.cursor.execute(f"INSERT OR REPLACE INTO exception_proposals_archive "
+                                    f"({EXCEPTION_PROPOSAL_COLUMNS}) SELECT {EXCEPTION_PROPOSAL_COLUMNS} "
+                                    f"FROM exception_proposals WHERE date < ?;", (before,))
+            self.cursor.execute("DELETE FROM exception_proposals WHERE date < ?;", (before,))
+        return self.cursor.rowcount
+
+    def delete_old_historic(self, days: int = config.EXCEPTION_PROPOSALS_RETENTION_DAYS, archive: bool = False
+                            ) -> int:
+        return self.purge_exception_proposals(datetime.date.today() - datetime.timedelta(days=days), archive)
+
+    def has_incremental_vacuum(self) -> bool:
+        return self.cursor.execute("PRAGMA auto_vacuum;").fetchone()[0] == 2
+
+    def enable_incremental_vacuum(self):
         self.sqlite_connection.commit()
+        self.cursor.execute("PRAGMA auto_vacuum = INCREMENTAL;")
+        self.cursor.execute("VACUUM;")
+
+    def vacuum_incrementally(self, pages: int) -> int:
+        self.cursor.execute(f"PRAGMA incremental_vacuum({int(pages)});").fetchall()
+        return self.cursor.execute("PRAGMA freelist_count;").fetchone()[0]
+
+    @staticmethod
+    def _get_agreement_values(agreement_: agreement.Agreement) -> tuple:
+        return (formater.format_cpf(agreement_.cpf), agreement_.value, agreement_.create_date, agreement_.d_plus,
+                agreement_.payed, agreement_.promise, agreement_.get_due_date(), agreement_.get_cancel_date(),
+                converter.cpf_to_int(agreement_.cpf))
 
     def add_agreement(self, agreement_: agreement.Agreement):
-        values = (formater.format_cpf(agreement_.cpf), agreement_.value, agreement_.create_date, agreement_.d_plus,
-                  agreement_.payed, agreement_.promise)
-        self.cursor.execute(
-            "INSERT INTO agreements (cpf, value, create_date, d_plus, payed, promise) VALUES (?, ?, ?, ?, ?, ?);",
-            values)
-        self.sqlite_connection.commit()
+        self.cursor.execute(INSERT_AGREEMENT, self._get_agreement_values(agreement_))
+        self.commit()
         agreement_.id = self.cursor.lastrowid
+        self._update_statistics(None, self._get_statistics_entry(agreement_.id))
+
+    def add_agreements(self, agreements: typing.Iterable[agreement.Agreement]) -> int:
+        with self.transaction():
+            self.cursor.executemany(INSERT_AGREEMENT, map(self._get_agreement_values, agreements))
+        self.statistics = None
+        return self.cursor.rowcount
 
     def get_agreement_historic(self) -> typing.List[agreement.Agreement]:
-        self.cursor.execute("SELECT * FROM agreements;")
-        return [(agreement.Agreement(*values)) for values in self.cursor.fetchall()]
+        return list(self.iter_agreements())
 
-    def set_agreement_as_payed(self, id_: int):
-        self.cursor.execute("UPDATE agreements SET payed = ? WHERE id = ?;", (True, id_))
-        self.sqlite_connection.commit()
+    @staticmethod
+    def _get_agreement_filter(state: typing.Optional[int] = None, cpf: typing.Optional[str] = None,
+                              start_date: typing.Optional[datetime.date] = None,
+                              end_date: typing.Optional[datetime.date] = None, cpf_prefix: bool = False,
+                              today: typing.Optional[datetime.date] = None) -> typing.Tuple[str, dict]:
+        conditions = []
+        parameters = {"today": datetime.date.today() if today is None else today}
+        if state is not None:
+            conditions.append(STATE_CONDITIONS[state])
+        cpf_condition, cpf_parameters = _get_cpf_condition(cpf, cpf_prefix)
+        if cpf_condition is not None:
+            conditions.append(cpf_condition)
+            parameters.update(cpf_parameters)
+        if start_date is not None:
+            conditions.append("create_date >= :start_date")
+            parameters["start_date"] = start_date
+        if end_date is not None:
+            conditions.append("create_date <= :end_date")
+            parameters["end_date"] = end_date
+        where = " WHERE " + " AND ".join(f"({condition})" for condition in conditions) if conditions else ""
+        return where, parameters
 
-    def set_agreement_as_promise(self, id_: int):
-        self.cursor.execute("UPDATE agreements SET promise = ? WHERE id = ?;", (True, id_))
-        self.sqlite_connection.commit()
+    def iter_agreements(self, state: typing.Optional[int] = None, cpf: typing.Optional[str] = None,
+                        start_date: typing.Optional[datetime.date] = None,
+                        end_date: typing.Optional[datetime.date] = None, sort_column: typing.Optional[str] = None,
+                        reverse: bool = False, cpf_prefix: bool = False,
+                        today: typing.Optional[datetime.date] = None,
+                        chunk_size: int = FETCH_SIZE) -> typing.Iterator[agreement.Agreement]:
+        where, parameters = self._get_agreement_filter(state, cpf, start_date, end_date, cpf_prefix, today)
+        command = f"SELECT {AGREEMENT_COLUMNS} FROM agreements{where}{self._get_agreement_order(sort_column, reverse)};"
+        for values in self._iter_rows(command, parameters, chunk_size):
+            yield agreement.Agreement(*values)
+
+    @staticmethod
+    def _get_agreement_order(sort_column: typing.Optional[str] = None, reverse: bool = False) -> str:
+        if sort_column is None:
+            return ""
+        return f" ORDER BY {SORTING_COLUMNS[sort_column]} {'DESC' if reverse else 'ASC'}, id"
+
+    def get_agreements(self, *args, **kwargs) -> typing.List[agreement.Agreement]:
+        return list(self.iter_agreements(*args, **kwargs))
+
+    @staticmethod
+    def _get_agreement_keyset(agreement_: typing.Optional[agreement.Agreement], sort_column: typing.Optional[str]
+                              ) -> typing.Optional[tuple]:
+        if agreement_ is None:
+            return None
+        elif sort_column is None:
+            return None, agreement_.id
+        elif sort_column == "cpf":
+            return converter.cpf_to_int(agreement_.cpf), agreement_.id
+        elif sort_column == "due_date":
+            return agreement_.get_due_date(), agreement_.id
+        return getattr(agreement_, sort_column), agreement_.id
+
+    def get_agreements_page(self, offset: int = 0, limit: int = FETCH_SIZE,
+                            after: typing.Optional[agreement.Agreement] = None,
+                            before: typing.Optional[agreement.Agreement] = None, state: typing.Optional[int] = None,
+                            cpf: typing.Optional[str] = None, sort_column: typing.Optional[str] = None,
+                            reverse: bool = False, cpf_prefix: bool = False,
+                            today: typing.Optional[datetime.date] = None) -> typing.List[agreement.Agreement]:
+        where, parameters = self._get_agreement_filter(state, cpf, cpf_prefix=cpf_prefix, today=today)
+        rows = self._get_page_rows(AGREEMENT_COLUMNS, "agreements", where, parameters,
+                                   None if sort_column is None else SORTING_COLUMNS[sort_column], reverse, offset,
+                                   limit, self._get_agreement_keyset(after, sort_column),
+                                   self._get_agreement_keyset(before, sort_column))
+        return [agreement.Agreement(*values) for values in rows]
+
+    def count_agreements(self, state: typing.Optional[int] = None, cpf: typing.Optional[str] = None,
+                         cpf_prefix: bool = False, today: typing.Optional[datetime.date] = None) -> int:
+        where, parameters = self._get_agreement_filter(state, cpf, cpf_prefix=cpf_prefix, today=today)
+        return self.cursor.execute(f"SELECT count(*) FROM agreements{where};", parameters).fetchone()[0]
+
+    def get_data_version(self) -> int:
+        return self.cursor.execute("PRAGMA data_version;").fetchone()[0]
+
+    def get_agreement_statistics(self, start_date: typing.Optional[datetime.date] = None,
+                                 end_date: typing.Optional[datetime.date] = None,
+                                 today: typing.Optional[datetime.date] = None) -> agreement.AgreementStatistics:
+        if start_date is None and end_date is None:
+            today = datetime.date.today() if today is None else today
+            data_version = self.get_data_version()
+            if self.statistics is None or self.statistics_date != today or self.statistics_data_version != data_version:
+                self.statistics = self._query_agreement_statistics(today=today)
+                self.statistics_date = today
+                self.statistics_data_version = data_version
+            return self.statistics.copy()
+        return self._query_agreement_statistics(start_date, end_date, today)
+
+    def _query_agreement_statistics(self, start_date: typing.Optional[datetime.date] = None,
+                                    end_date: typing.Optional[datetime.date] = None,
+                                    today: typing.Optional[datetime.date] = None) -> agreement.AgreementStatistics:
+        rollup = self.get_agreement_rollup(start_date, end_date, today)
+        counts = {constants.PAYED: rollup.payed_count, constants.PROMISE: rollup.promise_count}
+        sums = {constants.PAYED: rollup.payed_sum, constants.PROMISE: rollup.promise_sum}
+        where, parameters = self._get_rollup_filter(start_date, end_date, today)
+        self.cursor.execute(f"SELECT {OPEN_STATE} AS state, CAST(total(open_count) AS INTEGER), total(open_sum) "
+                            f"FROM agreement_open_rollup{where} GROUP BY state;", parameters)
+        for state, count, sum_ in self.cursor.fetchall():
+            counts[state] = count
+            sums[state] = sum_
+        return agreement.AgreementStatistics(counts, sums)
+
+    @staticmethod
+    def _get_rollup_filter(start_date: typing.Optional[datetime.date] = None,
+                           end_date: typing.Optional[datetime.date] = None,
+                           today: typing.Optional[datetime.date] = None) -> typing.Tuple[str, dict]:
+        conditions = []
+        parameters = {"today": datetime.date.today() if today is None else today}
+        if start_date is not None:
+            conditions.append("day >= :start_date")
+            parameters["start_date"] = start_date
+        if end_date is not None:
+            conditions.append("day <= :end_date")
+            parameters["end_date"] = end_date
+        return (" WHERE " + " AND ".join(conditions) if conditions else ""), parameters
+
+    def get_agreement_rollup(self, start_date: typing.Optional[datetime.date] = None,
+                             end_date: typing.Optional[datetime.date] = None,
+                             today: typing.Optional[datetime.date] = None) -> agreement.AgreementRollup:
+        where, parameters = self._get_rollup_filter(start_date, end_date, today)
+        self.cursor.execute(f"SELECT {ROLLUP_COLUMNS} FROM agreement_rollup{where};", parameters)
+        return agreement.AgreementRollup(start_date, *self.cursor.fetchone())
+
+    def get_agreement_trend(self, granularity: int, start_date: datetime.date, end_date: datetime.date,
+                            today: typing.Optional[datetime.date] = None) -> typing.List[agreement.AgreementRollup]:
+        start_date = agreement.get_bucket_start(start_date, granularity)
+        where, parameters = self._get_rollup_filter(start_date, end_date, today)
+        self.cursor.execute(f"SELECT {ROLLUP_BUCKETS[granularity]} AS bucket, {ROLLUP_COLUMNS} FROM agreement_rollup"
+                            f"{where} GROUP BY bucket;", parameters)
+        buckets = {datetime.date.fromisoformat(row[0]): row[1:] for row in self.cursor.fetchall()}
+        trend = []
+        bucket = start_date
+        while bucket <= end_date:
+            trend.append(agreement.AgreementRollup(bucket, *buckets.get(bucket, ())))
+            bucket = agreement.shift_bucket(bucket, granularity, 1)
+        return trend
+
+    def get_agreement_state(self, id_: int, today: typing.Optional[datetime.date] = None) -> typing.Optional[int]:
+        today = datetime.date.today() if today is None else today
+        self.cursor.execute(f"SELECT {STATE} FROM agreements WHERE id = :id;", {"id": id_, "today": today})
+        row = self.cursor.fetchone()
+        return None if row is None else row[0]
+
+    def _get_statistics_entry(self, id_: int) -> typing.Optional[typing.Tuple[int, float]]:
+        if self.statistics is None:
+            return None
+        self.cursor.execute(f"SELECT {STATE}, value FROM agreements WHERE id = :id;",
+                            {"id": id_, "today": self.statistics_date})
+        return self.cursor.fetchone()
+
+    def _update_statistics(self, previous: typing.Optional[typing.Tuple[int, float]],
+                           current: typing.Optional[typing.Tuple[int, float]]):
+        if self.statistics is None:
+            return
+        if previous is not None:
+            self.statistics.remove(*previous)
+        if current is not None:
+            self.statistics.add(*current)
+
+    def _update_agreement(self, id_: int, command: str, parameters: tuple) -> int:
+        previous = self._get_statistics_entry(id_)
+        self.cursor.execute(command, parameters)
+        rowcount = self.cursor.rowcount
+        self.commit()
+        self._update_statistics(previous, self._get_statistics_entry(id_))
+        return rowcount
+
+    def set_agreement_as_payed(self, id_: int) -> int:
+        return self._update_agreement(id_, "UPDATE agreements SET payed = ? WHERE id = ?;", (True, id_))
+
+    def set_agreement_as_promise(self, id_: int) -> int:
+        return self._update_agreement(id_, "UPDATE agreements SET promise = ? WHERE id = ?;", (True, id_))
 
     def delete_agreement(self, id_: int):
-        self.cursor.execute("DELETE FROM agreements WHERE id = ?;", (id_,))
-        self.sqlite_connection.commit()
+        self._update_agreement(id_, "DELETE FROM agreements WHERE id = ?;", (id_,))
 
     def delete_exception_proposal(self, id_: int):
         self.cursor.execute("DELETE FROM exception_proposals WHERE id = ?;", (id_,))
-        self.sqlite_connection.commit()
+        self.commit()
 
     def edit_exception_proposal(self, id_: int, counter_proposal: float, installments: int):
         self.cursor.execute("UPDATE exception_proposals SET counter_proposal = ?, installments = ? WHERE id = ?;",
                             (counter_proposal, installments, id_))
-        self.sqlite_connection.commit()
+        self.commit()
@@ -3,7 +3,7 @@ import typing
 import datetime
 
 import agreement
-from common import constants, formater, regex, converter
+from common import codec, constants, formater, regex
 
 
 class Config:
@@ -73,6 +73,8 @@ class InstallmentProposal(Proposal):
 
 
 class ExceptionProposalSent:
+    __slots__ = ("cpf", "value", "d_plus", "create_date", "counter_proposal", "installments", "id")
+
     def __init__(self, cpf: str, value: float, create_date: datetime.date, d_plus: int,
                  counter_proposal: typing.Optional[float] = None, installments: typing.Optional[int] = None,
                  id_: typing.Optional[int] = None):
@@ -87,8 +89,8 @@ class ExceptionProposalSent:
     def get_due_date(self) -> datetime.date:
         return self.create_date + datetime.timedelta(days=self.d_plus)
 
-    def to_agreement(self) -> agreement.Agreement:
-        today = datetime.date.today()
+    def to_agreement(self, today: typing.Optional[datetime.date] = None) -> agreement.Agreement:
+        today = datetime.date.today() if today is None else today
         d_plus = (today - self.create_date).days
         return agreement.Agreement(self.cpf, self.value, today, d_plus)
 
@@ -137,8 +139,39 @@ class Debit:
         return (datetime.date.today() - self.due_date).days
 
 
+DEBIT_PRODUCTS = {"CBR": constants.CBRCREL, "CCR": constants.CCRCFI, "EP": constants.EPCFI}
+DEBIT_FIELDS = {**dict.fromkeys(DEBIT_PRODUCTS, "product"), "date": "date", "value": "value", "line": None}
+
+
+def iter_line_debits(line: typing.List[typing.Tuple[str, typing.Match]], complete: bool,
+                     fields: typing.Dict[str, typing.Match]) -> typing.Iterator[Debit]:
+    if complete:
+        fields.clear()
+    for field, match in line:
+        fields[field] = match
+        if len(fields) == 3:
+            yield Debit(DEBIT_PRODUCTS[fields["product"].lastgroup], codec.parse_brl(fields["value"].group()),
+                        codec.parse_date(fields["date"].group()))
+            fields.clear()
+    if complete:
+        fields.clear()
+
+
+def iter_debits(text: str) -> typing.Iterator[Debit]:
+    fields = {}
+    line = []
+    line_fields = set()
+    for match in regex.DEBIT_FIELD.finditer(text):
+        field = DEBIT_FIELDS[match.lastgroup]
+        if field is not None:
+            line.append((field, match))
+            line_fields.add(field)
+        elif line:
+            yield from iter_line_debits(line, len(line_fields) == 3, fields)
+            line.clear()
+            line_fields.clear()
+    yield from iter_line_debits(line, len(line_fields) == 3, fields)
+
+
 def get_debits_from_text(text: str) -> typing.List[Debit]:
-    debits = []
-    for value, product, due_date in zip(regex.BRL.findall(text), regex.PRODUCT.findall(text), regex.DATE.findall(text)):
-        debits.append(Debit(product, converter.brl_to_float(value), converter.parse_date(due_date)))
-    return debits
+    return list(iter_debits(text))
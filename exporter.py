@@ -0,0 +1,184 @@
+import csv
+import datetime
+import itertools
+import time
+import typing
+import zipfile
+from xml.sax.saxutils import escape
+
+import agreement
+import database
+import exception_proposal as ep
+import importer
+from common import codec, constants, converter
+
+CSV = "csv"
+XLSX = "xlsx"
+PROGRESS_INTERVAL = 5000
+XLSX_BUFFER_ROWS = 256
+XLSX_EPOCH = datetime.date(1899, 12, 30)
+
+AGREEMENT_HEADER = ("id", "cpf", "value", "create_date", "d_plus", "due_date", "payed", "promise", "state")
+EXCEPTION_PROPOSAL_HEADER = ("id", "cpf", "value", "create_date", "d_plus", "due_date", "counter_proposal",
+                             "installments")
+
+XML_DECLARATION = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+SPREADSHEET_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+PACKAGE_RELATIONSHIPS_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+DOCUMENT_RELATIONSHIPS_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+SPREADSHEET_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml"
+
+XLSX_CONTENT_TYPES = (
+    f'{XML_DECLARATION}<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    f'<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    f'<Default Extension="xml" ContentType="application/xml"/>'
+    f'<Override PartName="/xl/workbook.xml" ContentType="{SPREADSHEET_CONTENT_TYPE}.sheet.main+xml"/>'
+    f'<Override PartName="/xl/worksheets/sheet1.xml" ContentType="{SPREADSHEET_CONTENT_TYPE}.worksheet+xml"/>'
+    f'<Override PartName="/xl/styles.xml" ContentType="{SPREADSHEET_CONTENT_TYPE}.styles+xml"/></Types>'
+)
+XLSX_RELS = (
+    f'{XML_DECLARATION}<Relationships xmlns="{PACKAGE_RELATIONSHIPS_NS}">'
+    f'<Relationship Id="rId1" Type="{DOCUMENT_RELATIONSHIPS_NS}/officeDocument" Target="xl/workbook.xml"/>'
+    f'</Relationships>'
+)
+XLSX_WORKBOOK = (
+    f'{XML_DECLARATION}<workbook xmlns="{SPREADSHEET_NS}" xmlns:r="{DOCUMENT_RELATIONSHIPS_NS}">'
+    '<sheets><sheet name="{}" sheetId="1" r:id="rId1"/></sheets></workbook>'
+)
+XLSX_WORKBOOK_RELS = (
+    f'{XML_DECLARATION}<Relationships xmlns="{PACKAGE_RELATIONSHIPS_NS}">'
+    f'<Relationship Id="rId1" Type="{DOCUMENT_RELATIONSHIPS_NS}/worksheet" Target="worksheets/sheet1.xml"/>'
+    f'<Relationship Id="rId2" Type="{DOCUMENT_RELATIONSHIPS_NS}/styles" Target="styles.xml"/>'
+    f'</Relationships>'
+)
+XLSX_STYLES = (
+    f'{XML_DECLARATION}<styleSheet xmlns="{SPREADSHEET_NS}">'
+    '<fonts count="1"><font/></fonts><fills count="1"><fill/></fills><borders count="1"><border/></borders>'
+    '<cellStyleXfs count="1"><xf/></cellStyleXfs>'
+    '<cellXfs count="2"><xf/><xf numFmtId="14" applyNumberFormat="1"/></cellXfs></styleSheet>'
+)
+XLSX_SHEET_START = f'{XML_DECLARATION}<worksheet xmlns="{SPREADSHEET_NS}"><sheetData>'
+XLSX_SHEET_END = "</sheetData></worksheet>"
+
+
+class ExportReport:
+    def __init__(self, kind: str, rows: int, seconds: float, path: str):
+        self.kind = kind
+        self.rows = rows
+        self.seconds = seconds
+        self.path = path
+
+    def get_rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds > 0 else float(self.rows)
+
+
+def agreement_to_row(agreement_: agreement.Agreement, state: int) -> tuple:
+    return (agreement_.id, agreement_.cpf, agreement_.value, agreement_.create_date, agreement_.d_plus,
+            agreement_.get_due_date(), bool(agreement_.payed), bool(agreement_.promise), constants.STATES[state + 1])
+
+
+def exception_proposal_to_row(proposal: ep.ExceptionProposalSent) -> tuple:
+    return (proposal.id, proposal.cpf, proposal.value, proposal.create_date, proposal.d_plus,
+            proposal.get_due_date(), proposal.counter_proposal, proposal.installments)
+
+
+def get_format(path: str) -> str:
+    return XLSX if path.lower().endswith(".xlsx") else CSV
+
+
+def get_csv_value(value: typing.Any) -> typing.Any:
+    if isinstance(value, bool):
+        return converter.bool_to_str(value)
+    elif isinstance(value, float):
+        return codec.format_brl(value, False)
+    elif isinstance(value, datetime.date):
+        return codec.format_date(value)
+    return value
+
+
+def write_csv(path: str, header: typing.Sequence[str], rows: typing.Iterable[tuple]) -> int:
+    count = 0
+    with open(path, "w", newline="", encoding="utf-8-sig") as file:
+        writer = csv.writer(file, delimiter=";")
+        writer.writerow(header)
+        for row in rows:
+            writer.writerow(map(get_csv_value, row))
+            count += 1
+    return count
+
+
+def get_xlsx_cell(value: typing.Any) -> str:
+    if value is None:
+        return "<c/>"
+    elif isinstance(value, bool):
+        return f'<c t="b"><v>{int(value)}</v></c>'
+    elif isinstance(value, (int, float)):
+        return f"<c><v>{value}</v></c>"
+    elif isinstance(value, datetime.date):
+        return f'<c s="1"><v>{(value - XLSX_EPOCH).days}</v></c>'
+    return f'<c t="inlineStr"><is><t>{escape(str(value))}</t></is></c>'
+
+
+def get_xlsx_row(values: typing.Iterable[typing.Any]) -> str:
+    return "<row>" + "".join(map(get_xlsx_cell, values)) + "</row>"
+
+
+def write_xlsx(path: str, header: typing.Sequence[str], rows: typing.Iterable[tuple], sheet: str = "Planilha1"
+               ) -> int:
+    count = 0
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("[Content_Types].xml", XLSX_CONTENT_TYPES)
+        archive.writestr("_rels/.rels", XLSX_RELS)
+        archive.writestr("xl/workbook.xml", XLSX_WORKBOOK.format(escape(sheet)))
+        archive.writestr("xl/_rels/workbook.xml.rels", XLSX_WORKBOOK_RELS)
+        archive.writestr("xl/styles.xml", XLSX_STYLES)
+        with archive.open("xl/worksheets/sheet1.xml", "w") as file:
+            buffer = [XLSX_SHEET_START, get_xlsx_row(header)]
+            for row in rows:
+                buffer.append(get_xlsx_row(row))
+                count += 1
+                if len(buffer) >= XLSX_BUFFER_ROWS:
+                    file.write("".join(buffer).encode("utf-8"))
+                    buffer.clear()
+            buffer.append(XLSX_SHEET_END)
+            file.write("".join(buffer).encode("utf-8"))
+    return count
+
+
+def track_progress(rows: typing.Iterable[tuple], progress: typing.Optional[typing.Callable[[int], typing.Any]]
+                   ) -> typing.Iterator[tuple]:
+    if progress is None:
+        yield from rows
+        return
+    count = 0
+    for count, row in enumerate(rows, 1):
+        yield row
+        if count % PROGRESS_INTERVAL == 0:
+            progress(count)
+    progress(count)
+
+
+def export_file(database_: database.DataBase, path: str, kind: str,
+                progress: typing.Optional[typing.Callable[[int], typing.Any]] = None,
+                state: typing.Optional[int] = None, cpf: typing.Optional[str] = None,
+                start_date: typing.Optional[datetime.date] = None,
+                end_date: typing.Optional[datetime.date] = None, cpf_prefix: bool = False) -> ExportReport:
+    start = time.perf_counter()
+    if kind == importer.AGREEMENTS:
+        today = datetime.date.today()
+        classifier = agreement.StateClassifier(lambda: today)
+        header = AGREEMENT_HEADER
+        agreements = database_.iter_agreements(state, cpf, start_date, end_date, sort_column="create_date",
+                                               cpf_prefix=cpf_prefix, today=today)
+        rows = itertools.starmap(agreement_to_row, classifier.iter_states(agreements))
+        sheet = "Acordos"
+    else:
+        header = EXCEPTION_PROPOSAL_HEADER
+        rows = map(exception_proposal_to_row, database_.iter_exception_proposals(cpf, cpf_prefix))
+        sheet = "Propostas de exceção"
+    rows = track_progress(rows, progress)
+    if get_format(path) == XLSX:
+        count = write_xlsx(path, header, rows, sheet)
+    else:
+        count = write_csv(path, header, rows)
+    return ExportReport(kind, count, time.perf_counter() - start, path)
@@ -0,0 +1,137 @@
+import csv
+import datetime
+import json
+import time
+import typing
+
+import agreement
+import database
+import exception_proposal as ep
+from common import converter
+
+AGREEMENTS = "agreements"
+EXCEPTION_PROPOSALS = "exception_proposals"
+JSON_CHUNK_SIZE = 64 * 1024
+
+
+class ImportReport:
+    def __init__(self, kind: str, rows: int, seconds: float):
+        self.kind = kind
+        self.rows = rows
+        self.seconds = seconds
+
+    def get_rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds > 0 else float(self.rows)
+
+
+def parse_cpf(value: typing.Union[str, int]) -> str:
+    cpf = str(value).strip()
+    return cpf.zfill(11) if cpf.isdigit() else cpf
+
+
+def parse_brl(value: typing.Union[str, int, float]) -> float:
+    if isinstance(value, (int, float)):
+        return float(value)
+    value = value.strip()
+    if "," in value:
+        return converter.brl_to_float(value)
+    return float(value)
+
+
+def parse_date(value: typing.Union[str, datetime.date]) -> datetime.date:
+    if isinstance(value, datetime.date):
+        return value
+    value = value.strip()
+    try:
+        return converter.parse_date(value)
+    except ValueError:
+        return datetime.date.fromisoformat(value)
+
+
+def parse_bool(value: typing.Union[str, int, bool, None]) -> bool:
+    if isinstance(value, str):
+        return value.strip().lower() in ("1", "true", "s", "sim")
+    return bool(value)
+
+
+def parse_optional(parse: typing.Callable[[typing.Any], typing.Any], value: typing.Any) -> typing.Any:
+    return None if value is None or value == "" else parse(value)
+
+
+def get_d_plus(row: dict, create_date: datetime.date) -> int:
+    if row.get("d_plus") not in (None, ""):
+        return int(row["d_plus"])
+    return (parse_date(row["due_date"]) - create_date).days
+
+
+def row_to_agreement(row: dict) -> agreement.Agreement:
+    create_date = parse_date(row["create_date"])
+    return agreement.Agreement(parse_cpf(row["cpf"]), parse_brl(row["value"]), create_date,
+                               get_d_plus(row, create_date), parse_bool(row.get("payed")),
+                               parse_bool(row.get("promise")))
+
+
+def row_to_exception_proposal(row: dict) -> ep.ExceptionProposalSent:
+    create_date = parse_date(row["create_date"] if "create_date" in row else row["date"])
+    return ep.ExceptionProposalSent(parse_cpf(row["cpf"]), parse_brl(row["value"]), create_date,
+                                    get_d_plus(row, create_date),
+                                    parse_optional(parse_brl, row.get("counter_proposal")),
+                                    parse_optional(int, row.get("installments")))
+
+
+ROW_PARSERS = {AGREEMENTS: row_to_agreement, EXCEPTION_PROPOSALS: row_to_exception_proposal}
+
+
+def read_csv(path: str) -> typing.Iterator[dict]:
+    with open(path, newline="", encoding="utf-8-sig") as file:
+        sample = file.read(4096)
+        file.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+        except csv.Error:
+            dialect = csv.excel
+        yield from csv.DictReader(file, dialect=dialect)
+
+
+def read_json(path: str) -> typing.Iterator[dict]:
+    decoder = json.JSONDecoder()
+    with open(path, encoding="utf-8-sig") as file:
+        buffer = file.read(JSON_CHUNK_SIZE).lstrip()
+        if not buffer.startswith("["):
+            file.seek(0)
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+            return
+        buffer = buffer[1:]
+        while True:
+            buffer = buffer.lstrip(" \t\r\n,")
+            if buffer.startswith("]"):
+                return
+            try:
+                row, end = decoder.raw_decode(buffer)
+            except json.JSONDecodeError:
+                chunk = file.read(JSON_CHUNK_SIZE)
+                if not chunk:
+                    raise
+                buffer += chunk
+            else:
+                yield row
+                buffer = buffer[end:]
+
+
+def read_rows(path: str) -> typing.Iterator[dict]:
+    if path.lower().endswith((".json", ".jsonl")):
+        return read_json(path)
+    return read_csv(path)
+
+
+def import_file(database_: database.DataBase, path: str, kind: str) -> ImportReport:
+    parse = ROW_PARSERS[kind]
+    start = time.perf_counter()
+    records = map(parse, read_rows(path))
+    if kind == AGREEMENTS:
+        rows = database_.add_agreements(records)
+    else:
+        rows = database_.add_exception_proposals(records)
+    return ImportReport(kind, rows, time.perf_counter() - start)
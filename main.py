@@ -1,21 +1,28 @@
 from __future__ import annotations
+from common import timing
 import functools
 import json
 import os.path
 
-from common import widgets, formater, converter, utils, regex, config, validators
+from common import widgets, formater, converter, utils, regex, config, validators, scheduler, codec
 from common import constants
-from tkinter import ttk
+from tkinter import ttk, filedialog
 
 import datetime
-import threading
 import tkinter as tk
 import typing
 import about
 import agreement
-import database
 import exception_proposal as ep
+import exporter
+import importer
+import migrations
+import plans
+import retention
 import sv_ttk
+import worker
+
+timing.mark("imports")
 
 
 class LabelAndWidget(ttk.Frame):
@@ -58,11 +65,9 @@ Installments = functools.partial(LabelAndWidget, widget=ttk.Spinbox, text="Quant
 Cpf = functools.partial(LabelAndWidget, widget=ttk.Entry, text="CPF")
 
 
-class AgreementTreeView(widgets.BrowseTreeview):
-    SORTING_TABLE = {"#1": lambda agreement_: agreement_.cpf, "#2": lambda agreement_: agreement_.first,
-                     "#3": lambda agreement_: agreement_.create_date,
-                     "#4": lambda agreement_: agreement_.get_due_date(), "#5": lambda agreement_: agreement_.payed,
-                     "#6": lambda agreement_: agreement_.promise}
+class AgreementTreeView(widgets.VirtualBrowseTreeview):
+    SORTING_COLUMNS = {"#1": "cpf", "#2": "value", "#3": "create_date", "#4": "due_date", "#5": "payed",
+                       "#6": "promise"}
 
     def __init__(self, *args, **kwargs):
         cpf = "cpf"
@@ -87,52 +92,20 @@ class AgreementTreeView(widgets.BrowseTreeview):
         self.heading(due_date, text="Vencimento")
         self.heading(promise, text="Promessa")
         self.context_menu_management.context_menu_selected.add_command(label="Copiar CPF", command=self.on_copy_cpf)
-        self.own_bind("<Sort>", self.on_sort)
-
-    def on_sort(self, column: str, reverse: bool):
-        self.update_agreements(self.get_agreements(self.get_children()), sort_key=self.SORTING_TABLE[column],
-                               reverse_sort=reverse)
 
     def on_copy_cpf(self):
-        agreement_ = self.get_agreement(self.selection()[0])
-        utils.copy_to_clipboard(self, formater.format_cpf(agreement_.cpf, False))
-
-    def add_agreements(self, agreements: typing.Iterable[agreement.Agreement]):
-        for agreement_ in agreements:
-            self.add_agreement(agreement_)
-
-    def add_agreement(self, agreement_):
-        self.insert("", tk.END, iid=str(agreement_.id), values=(
-            formater.format_cpf(agreement_.cpf, True), formater.format_brl(agreement_.value),
-            agreement_.create_date.strftime("%d/%m/%Y"), agreement_.get_due_date().strftime("%d/%m/%Y"),
-            converter.bool_to_str(agreement_.payed), converter.bool_to_str(agreement_.promise)))
-
-    def get_agreements(self, keys: typing.Iterable[str]) -> typing.List[agreement.Agreement]:
-        return [self.get_agreement(key) for key in keys]
-
-    def get_agreement(self, key: str):
-        item = self.item(key)
-        cpf, value, create_date, due_date, payed, promise = item["values"]
-        create_date = converter.parse_date(create_date)
-        due_date = converter.parse_date(due_date)
-        d_plus = (due_date - create_date).days
-        agreement_ = agreement.Agreement(cpf, converter.brl_to_float(value), create_date, d_plus,
-                                         converter.str_to_bool(payed), converter.str_to_bool(promise), int(key))
-        return agreement_
-
-    def update_agreements(self, agreements: typing.Iterable[agreement.Agreement], state: typing.Optional[int] = None,
-                          sort_key: typing.Callable[[agreement.Agreement], typing.Any] = None,
-                          reverse_sort: bool = False, cpf: typing.Optional[str] = None) -> None:
-        self.delete(*self.get_children())
-        if state is not None:
-            agreements = list(filter(lambda agreement_: agreement_.get_state() == state, agreements))
-        if cpf is not None:
-            agreements = list(filter(lambda agreement_: cpf.replace(".", "") in formater.format_cpf(agreement_.cpf,
-                                                                                                    False),
-                                     agreements))
-        if sort_key is not None:
-            agreements.sort(key=sort_key, reverse=reverse_sort)
-        self.add_agreements(agreements)
+        key = self.selection()[0]
+        if self.has_row(key):
+            utils.copy_to_clipboard(self, formater.format_cpf(self.get_agreement(key).cpf, False))
+
+    def get_values(self, key: str) -> tuple:
+        agreement_ = self.get_agreement(key)
+        return (formater.format_cpf(agreement_.cpf, True), formater.format_brl(agreement_.value),
+                codec.format_date(agreement_.create_date), codec.format_date(agreement_.get_due_date()),
+                converter.bool_to_str(agreement_.payed), converter.bool_to_str(agreement_.promise))
+
+    def get_agreement(self, key: str) -> agreement.Agreement:
+        return self.get_row(key)
 
 
 class Statistics(ttk.Label):
@@ -148,10 +121,41 @@ class Statistics(ttk.Label):
             self.config(text=f"{self.title}: {str(value)}")
 
 
+class TrendTreeView(widgets.Treeview):
+    def __init__(self, master):
+        period = "period"
+        negotiated = "negotiated"
+        payed = "payed"
+        canceled = "canceled"
+        columns = (period, negotiated, payed, canceled)
+        super().__init__(master, show="headings", columns=columns, height=6)
+        for column in columns:
+            self.column(column, minwidth=32, width=1, stretch=True)
+        self.heading(period, text="Período")
+        self.heading(negotiated, text="Negociados")
+        self.heading(payed, text="Pagos")
+        self.heading(canceled, text="Cancelados")
+
+    @staticmethod
+    def format_period(start: datetime.date, granularity: int) -> str:
+        if granularity == constants.MONTHLY:
+            return f"{start.month:02d}/{start.year}"
+        return codec.format_date(start)
+
+    def update_trend(self, trend: typing.Iterable[agreement.AgreementRollup], granularity: int):
+        self.delete(*self.get_children())
+        for rollup in reversed(list(trend)):
+            self.insert("", tk.END, values=(self.format_period(rollup.start, granularity),
+                                            f"{rollup.negotiated_count} ({formater.format_brl(rollup.negotiated_sum)})",
+                                            f"{rollup.payed_count} ({formater.format_brl(rollup.payed_sum)})",
+                                            f"{rollup.cancel_count} ({formater.format_brl(rollup.cancel_sum)})"))
+
+
 class AgreementControlWindow:
     STATES = ("Pago", "Promessa", "Cancelado", "Atrasado", "Ativo")
 
-    def __init__(self, database_: database.DataBase):
+    def __init__(self, worker_: worker.DataBaseWorker, log: typing.Callable[[str], typing.Any]):
+        self.log = log
         self.top_level = tk.Toplevel()
         self.top_level.minsize(*config.MIN_RESOLUTION)
         self.top_level.geometry(f"{config.START_RESOLUTION[0]}x{config.START_RESOLUTION[1]}")
@@ -159,6 +163,10 @@ class AgreementControlWindow:
         self.top_level.title("Controle de acordos")
         self.top_level.protocol("WM_DELETE_WINDOW", self.top_level.withdraw)
         self.top_level.iconbitmap("icon.ico")
+        self.cpf_filter_job: typing.Optional[str] = None
+        self.stale = True
+        self.agreements_query: typing.Optional[tuple] = None
+        self.agreements_generation = 0
         right_frame = ttk.LabelFrame(self.top_level, text="Estatísticas")
         right_frame.pack(fill=tk.Y, side=tk.RIGHT, padx=(5, 0))
         left_frame = ttk.LabelFrame(self.top_level, text="Histórico")
@@ -175,6 +183,14 @@ class AgreementControlWindow:
         self.historic.pack(fill=tk.BOTH, expand=True, side=tk.LEFT)
         historic_scroll_bar = ttk.Scrollbar(historic_frame, command=self.historic.yview)
         historic_scroll_bar.pack(fill=tk.Y, side=tk.LEFT)
+        trend_frame = ttk.LabelFrame(left_frame, text="Tendência")
+        trend_frame.pack(fill=tk.X, padx=10, pady=5, side=tk.BOTTOM)
+        self.granularity = LabelAndWidget(trend_frame, "Agrupamento", ttk.Combobox, values=constants.GRANULARITIES,
+                                          state="readonly")
+        self.granularity.widget.set(constants.GRANULARITIES[constants.DAILY])
+        self.granularity.pack(side=tk.LEFT, anchor=tk.N, padx=5, pady=5)
+        self.trend = TrendTreeView(trend_frame)
+        self.trend.pack(fill=tk.X, expand=True, side=tk.LEFT, padx=5, pady=5)
         period_filter_label_frame = ttk.LabelFrame(right_frame, text="Filtro")
         period_filter_label_frame.pack(fill=tk.BOTH, padx=5, pady=5)
         self.period = LabelAndWidget(period_filter_label_frame, "Período", ttk.Combobox,
@@ -197,111 +213,136 @@ class AgreementControlWindow:
         self.agreements_overdue = Statistics(quantities, "Atrasados")
         self.agreements_promise = Statistics(quantities, "Promessas")
         self.historic.config(yscrollcommand=historic_scroll_bar.set)
-        self.state.widget.bind("<<ComboboxSelected>>", lambda _: self.on_select_state(database_))
-        self.period.widget.bind("<<ComboboxSelected>>", lambda _: self.on_select_period(database_))
-        self.update(database_.get_agreement_historic())
+        self.state.widget.bind("<<ComboboxSelected>>", lambda _: self.on_select_state(worker_))
+        self.period.widget.bind("<<ComboboxSelected>>", lambda _: self.on_select_period(worker_))
+        self.granularity.widget.bind("<<ComboboxSelected>>", lambda _: self.update_trend_with_context(worker_))
+        self.historic.own_bind("<Sort>", lambda *_: self.update_agreements_with_context(worker_))
         self.historic.context_menu_management.context_menu_selected.add_command(
             label="Definir como pago",
-            command=lambda: self.on_set_agreement_as_payed(database_)
+            command=lambda: self.on_set_agreement_as_payed(worker_)
         )
         self.historic.context_menu_management.context_menu_selected.add_command(
             label="Definir como promessa",
-            command=lambda: self.on_set_agreement_as_promise(database_)
+            command=lambda: self.on_set_agreement_as_promise(worker_)
         )
         self.historic.context_menu_management.context_menu_selected.add_command(
             label="Deletar",
-            command=lambda: self.on_delete_agreement(database_)
+            command=lambda: self.on_delete_agreement(worker_)
         )
-        self.cpf.widget.bind("<KeyRelease>", lambda _: self.on_cpf_filter_change(database_))
-
-    def on_set_agreement_as_promise(self, database_: database.DataBase):
-        agreement_ = self.historic.get_agreement(self.historic.selection()[0])
-        database_.set_agreement_as_promise(agreement_.id)
-        self.update_agreements_with_context(database_)
-        self.update_statistics(database_.get_agreement_historic())
-
-    def on_set_agreement_as_payed(self, database_: database.DataBase):
-        agreement_ = self.historic.get_agreement(self.historic.selection()[0])
-        database_.set_agreement_as_payed(agreement_.id)
-        self.update_agreements_with_context(database_)
-        self.update_statistics(database_.get_agreement_historic())
-
-    def on_select_state(self, database_: database.DataBase):
-        self.update_agreements_with_context(database_)
-
-    def on_cpf_filter_change(self, database_: database.DataBase):
-        self.update_agreements_with_context(database_)
-
-    def update_agreements_with_context(self, database_: database.DataBase):
-        agreements = database_.get_agreement_historic()
-        cpf = self.cpf.get() if self.cpf.validate() else None
+        self.cpf.widget.bind("<KeyRelease>", lambda _: self.on_cpf_filter_change(worker_))
+
+    def on_set_agreement_as_promise(self, worker_: worker.DataBaseWorker):
+        id_ = int(self.historic.selection()[0])
+        worker_.submit(lambda database_: database_.set_agreement_as_promise(id_),
+                       error_callback=lambda error: self.log(f"Falha ao definir o acordo como promessa: {error}"))
+        self.update(worker_)
+
+    def on_set_agreement_as_payed(self, worker_: worker.DataBaseWorker):
+        id_ = int(self.historic.selection()[0])
+        worker_.submit(lambda database_: database_.set_agreement_as_payed(id_),
+                       error_callback=lambda error: self.log(f"Falha ao definir o acordo como pago: {error}"))
+        self.update(worker_)
+
+    def on_select_state(self, worker_: worker.DataBaseWorker):
+        self.update_agreements_with_context(worker_)
+
+    def on_cpf_filter_change(self, worker_: worker.DataBaseWorker):
+        if self.cpf_filter_job is not None:
+            self.top_level.after_cancel(self.cpf_filter_job)
+        self.cpf_filter_job = self.top_level.after(config.CPF_FILTER_DELAY,
+                                                   lambda: self.on_cpf_filter_idle(worker_))
+
+    def on_cpf_filter_idle(self, worker_: worker.DataBaseWorker):
+        self.cpf_filter_job = None
+        if self.get_agreements_query() != self.agreements_query:
+            self.update_agreements_with_context(worker_)
+
+    def get_agreements_query(self) -> tuple:
+        cpf = converter.only_digits(self.cpf.get()) if self.cpf.validate() else ""
         state = self.state.get()
-        self.historic.update_agreements(agreements, self.STATES.index(state) if state in self.STATES else None,
-                                        self.historic.SORTING_TABLE.get(self.historic.sorting_column),
-                                        self.historic.reverse_sorting, cpf)
-
-    def on_select_period(self, database_: database.DataBase):
-        agreements = database_.get_agreement_historic()
-        period = self.period.get()
+        state = self.STATES.index(state) if state in self.STATES else None
+        sort_column = self.historic.SORTING_COLUMNS.get(self.historic.sorting_column)
+        return cpf or None, state, sort_column, self.historic.reverse_sorting
+
+    def update_agreements_with_context(self, worker_: worker.DataBaseWorker):
+        self.agreements_query = cpf, state, sort_column, reverse = self.get_agreements_query()
+        self.agreements_generation += 1
+        generation = self.agreements_generation
+        worker_.submit(lambda database_: database_.count_agreements(state, cpf, True),
+                       lambda total: self.on_agreements(worker_, generation, total), key="agreements")
+
+    def on_agreements(self, worker_: worker.DataBaseWorker, generation: int, total: int):
+        if generation != self.agreements_generation:
+            return
+        cpf, state, sort_column, reverse = self.agreements_query
+        self.historic.set_source(total, lambda offset, limit, after, before, callback: worker_.submit(
+            lambda database_: [(str(agreement_.id), agreement_) for agreement_ in database_.get_agreements_page(
+                offset, limit, after, before, state, cpf, sort_column, reverse, True)], callback))
+
+    def on_select_period(self, worker_: worker.DataBaseWorker):
+        self.update_statistics_with_context(worker_)
+
+    def get_period(self) -> typing.Tuple[typing.Optional[datetime.date], typing.Optional[datetime.date]]:
+        periods = {"Hoje": constants.DAILY, "Esta semana": constants.WEEKLY, "Este mês": constants.MONTHLY}
+        granularity = periods.get(self.period.get())
+        if granularity is None:
+            return None, None
         today = datetime.date.today()
-        tomorrow = today + datetime.timedelta(days=1)
-        yesterday = today - datetime.timedelta(days=1)
-        first_week_day = today.replace(day=today.day - today.weekday())
-        last_week_day = first_week_day + datetime.timedelta(days=7)
-        first_month_day = today.replace(day=1)
-        last_month_day = first_month_day + datetime.timedelta(days=30)
-        filters = {"Hoje": lambda agreement_: yesterday < agreement_.create_date < tomorrow,
-                   "Esta semana": lambda agreement_: first_week_day < agreement_.create_date < last_week_day,
-                   "Este mês": lambda agreement_: first_month_day < agreement_.create_date < last_month_day}
-        filter_ = filters.get(period)
-        if filter_ is None:
-            filtered_agreements = agreements
-        else:
-            filtered_agreements = list(filter(filter_, agreements))
-        self.update_statistics(filtered_agreements)
+        return agreement.get_bucket_start(today, granularity), agreement.get_bucket_end(today, granularity)
+
+    def show(self, worker_: worker.DataBaseWorker):
+        self.top_level.deiconify()
+        if self.stale:
+            self.update(worker_)
+
+    def update(self, worker_: worker.DataBaseWorker):
+        if self.top_level.state() == "withdrawn":
+            self.stale = True
+            return
+        self.stale = False
+        self.update_agreements_with_context(worker_)
+        self.update_statistics_with_context(worker_)
+        self.update_trend_with_context(worker_)
+
+    def update_trend_with_context(self, worker_: worker.DataBaseWorker):
+        granularity = constants.GRANULARITIES.index(self.granularity.get())
+        today = datetime.date.today()
+        start_date = agreement.shift_bucket(today, granularity, 1 - config.TREND_BUCKETS)
+        worker_.submit(lambda database_: database_.get_agreement_trend(granularity, start_date, today, today),
+                       lambda trend: self.trend.update_trend(trend, granularity), key="trend")
 
-    def update(self, agreements: typing.List[agreement.Agreement]):
-        self.historic.update_agreements(agreements)
-        self.update_statistics(agreements)
+    def update_statistics_with_context(self, worker_: worker.DataBaseWorker):
+        start_date, end_date = self.get_period()
+        worker_.submit(lambda database_: database_.get_agreement_statistics(start_date, end_date),
+                       self.update_statistics, key="statistics")
 
-    def update_statistics(self, agreements: typing.List[agreement.Agreement]):
+    def update_statistics(self, statistics: agreement.AgreementStatistics):
         def get_percentage(fraction: typing.Union[int, float], total: typing.Union[int, float]):
             return round(fraction / total * 100, 2)
 
-        def get_agreements_sum(_agreements):
-            return sum(map(lambda agreement_: agreement_.value, _agreements))
-
-        def filter_agreements_by_state(_agreements, state: int):
-            return tuple(filter(lambda agreement_: agreement_.get_state() == state, _agreements))
-
-        def get_total_text(_agreements, total: typing.Union[int, float]):
-            sum_ = get_agreements_sum(_agreements)
-            return f"{formater.format_brl(sum_)} ({get_percentage(sum_, total)}%)"
+        def get_total_text(state: int):
+            sum_ = statistics.get_sum(state)
+            return f"{formater.format_brl(sum_)} ({get_percentage(sum_, agreements_sum)}%)"
 
-        def get_quantity_text(_agreements, total: typing.Union[int, float]):
-            len_ = len(_agreements)
-            return f"{len_} ({get_percentage(len_, total)}%)"
+        def get_quantity_text(state: int):
+            count = statistics.get_count(state)
+            return f"{count} ({get_percentage(count, agreements_quantity)}%)"
 
-        if agreements:
-            active = filter_agreements_by_state(agreements, constants.ACTIVE)
-            payed = filter_agreements_by_state(agreements, constants.PAYED)
-            cancelled = filter_agreements_by_state(agreements, constants.CANCELED)
-            overdue = filter_agreements_by_state(agreements, constants.OVERDUE)
-            promise = filter_agreements_by_state(agreements, constants.PROMISE)
-            agreements_sum = get_agreements_sum(agreements)
-            agreements_quantity = len(agreements)
+        agreements_quantity = statistics.get_count()
+        if agreements_quantity:
+            agreements_sum = statistics.get_sum()
             self.total_negotiated.set_title(formater.format_brl(agreements_sum))
-            self.total_active.set_title(get_total_text(active, agreements_sum))
-            self.total_payed.set_title(get_total_text(payed, agreements_sum))
-            self.total_canceled.set_title(get_total_text(cancelled, agreements_sum))
-            self.total_overdue.set_title(get_total_text(overdue, agreements_sum))
-            self.total_promise.set_title(get_total_text(promise, agreements_sum))
+            self.total_active.set_title(get_total_text(constants.ACTIVE))
+            self.total_payed.set_title(get_total_text(constants.PAYED))
+            self.total_canceled.set_title(get_total_text(constants.CANCELED))
+            self.total_overdue.set_title(get_total_text(constants.OVERDUE))
+            self.total_promise.set_title(get_total_text(constants.PROMISE))
             self.agreements_quantity.set_title(agreements_quantity)
-            self.agreements_active.set_title(get_quantity_text(active, agreements_quantity))
-            self.agreements_payed.set_title(get_quantity_text(payed, agreements_quantity))
-            self.agreements_canceled.set_title(get_quantity_text(cancelled, agreements_quantity))
-            self.agreements_overdue.set_title(get_quantity_text(overdue, agreements_quantity))
-            self.agreements_promise.set_title(get_quantity_text(promise, agreements_quantity))
+            self.agreements_active.set_title(get_quantity_text(constants.ACTIVE))
+            self.agreements_payed.set_title(get_quantity_text(constants.PAYED))
+            self.agreements_canceled.set_title(get_quantity_text(constants.CANCELED))
+            self.agreements_overdue.set_title(get_quantity_text(constants.OVERDUE))
+            self.agreements_promise.set_title(get_quantity_text(constants.PROMISE))
         else:
             for statistic in (self.total_negotiated, self.total_active, self.total_payed, self.total_canceled,
                               self.total_overdue, self.total_promise, self.agreements_quantity, self.agreements_active,
@@ -309,15 +350,20 @@ class AgreementControlWindow:
                               self.agreements_promise):
                 statistic.set_title()
 
-    def on_delete_agreement(self, database_: database.DataBase):
+    def on_delete_agreement(self, worker_: worker.DataBaseWorker):
         selection = self.historic.selection()[0]
-        agreement_selected = self.historic.get_agreement(selection)
         self.historic.delete(selection)
-        database_.delete_agreement(agreement_selected.id)
-        self.update_statistics(database_.get_agreement_historic())
+        worker_.submit(lambda database_: database_.delete_agreement(int(selection)),
+                       error_callback=lambda error: self.on_delete_agreement_error(worker_, error))
+        self.update_statistics_with_context(worker_)
+        self.update_trend_with_context(worker_)
 
+    def on_delete_agreement_error(self, worker_: worker.DataBaseWorker, error: BaseException):
+        self.log(f"Falha ao deletar o acordo: {error}")
+        self.update(worker_)
 
-class ExceptionProposalHistoricTreeView(widgets.BrowseTreeview):
+
+class ExceptionProposalHistoricTreeView(widgets.VirtualBrowseTreeview):
     def __init__(self, master):
         cpf = "cpf"
         value = "value"
@@ -339,28 +385,22 @@ class ExceptionProposalHistoricTreeView(widgets.BrowseTreeview):
         self.context_menu_management.context_menu_selected.add_command(label="Copiar", command=self.on_copy)
 
     def on_copy(self):
-        item = self.item(self.selection()[0])
-        cpf = formater.format_cpf(item["values"][0], False)
-        return utils.copy_to_clipboard(self, cpf)
+        selected = self.selection()
+        if selected and self.has_row(selected[0]):
+            utils.copy_to_clipboard(self, formater.format_cpf(self.get_exception_proposal(selected[0]).cpf, False))
 
     def add_exception_proposal(self, proposal: ep.ExceptionProposalSent):
-        values = formater.format_cpf(proposal.cpf), formater.format_brl(proposal.value), \
-            proposal.create_date.strftime("%d/%m/%Y"), proposal.get_due_date().strftime("%d/%m/%Y"), \
-            "" if proposal.counter_proposal is None else formater.format_brl(proposal.counter_proposal), \
-            "" if proposal.installments is None else proposal.installments
-        self.insert("", tk.END, iid=str(proposal.id), values=values)
-
-    def get_exception_proposal(self, key: str):
-        item = self.item(key)
-        cpf, value, create_date, due_date, counter_proposal, installments = item["values"]
-        create_date = converter.parse_date(create_date)
-        due_date = converter.parse_date(due_date)
-        d_plus = (due_date - create_date).days
-        return ep.ExceptionProposalSent(formater.format_cpf(cpf, False), converter.brl_to_float(value),
-                                        create_date, d_plus,
-                                        None if counter_proposal == "" else converter.brl_to_float(counter_proposal),
-                                        None if installments == "" else int(installments),
-                                        int(key))
+        self.append_row(str(proposal.id), proposal)
+
+    def get_values(self, key: str) -> tuple:
+        proposal = self.get_exception_proposal(key)
+        return (formater.format_cpf(proposal.cpf), formater.format_brl(proposal.value),
+                codec.format_date(proposal.create_date), codec.format_date(proposal.get_due_date()),
+                "" if proposal.counter_proposal is None else formater.format_brl(proposal.counter_proposal),
+                "" if proposal.installments is None else proposal.installments)
+
+    def get_exception_proposal(self, key: str) -> ep.ExceptionProposalSent:
+        return self.get_row(key)
 
 
 class ExceptionProposalHistoricWindow:
@@ -380,13 +420,16 @@ class ExceptionProposalHistoricWindow:
         self.counter_proposal.pack(fill=tk.X, padx=5)
         self.installments = Installments(left_frame)
         self.installments.pack(fill=tk.X, padx=5)
-        self.confirm = widgets.Button(left_frame, text="Confirmar", command=lambda: self.on_confirm(app))
+        self.confirm = widgets.Button(left_frame, app.scheduler, text="Confirmar", command=lambda: self.on_confirm(app))
         self.confirm.pack(side=tk.BOTTOM, pady=10)
-        self.historic = ExceptionProposalHistoricTreeView(right_frame)
-        self.historic.pack(padx=10, pady=10, fill=tk.BOTH, expand=True)
-        exception_proposals = app.database.get_exception_proposals_historic()
-        for exception_proposal in exception_proposals:
-            self.historic.add_exception_proposal(exception_proposal)
+        historic_frame = ttk.Frame(right_frame)
+        historic_frame.pack(padx=10, pady=10, fill=tk.BOTH, expand=True)
+        self.historic = ExceptionProposalHistoricTreeView(historic_frame)
+        self.historic.pack(fill=tk.BOTH, expand=True, side=tk.LEFT)
+        historic_scroll_bar = ttk.Scrollbar(historic_frame, command=self.historic.yview)
+        historic_scroll_bar.pack(fill=tk.Y, side=tk.LEFT)
+        self.historic.config(yscrollcommand=historic_scroll_bar.set)
+        self.stale = True
         self.historic.context_menu_management.context_menu_selected.add_command(
             label="Remover",
             command=lambda: self.on_remove(app))
@@ -394,19 +437,50 @@ class ExceptionProposalHistoricWindow:
     def on_remove(self, app: EasyServiceApp):
         selected = self.historic.selection()[0]
         self.historic.delete(selected)
-        app.database.delete_exception_proposal(int(selected))
+        app.database_worker.submit(lambda database_: database_.delete_exception_proposal(int(selected)),
+                                   error_callback=lambda error: self.on_error(
+                                       app, f"Falha ao remover a proposta de exceção: {error}"))
 
     def on_confirm(self, app: EasyServiceApp):
         counter_proposal = self.counter_proposal.get()
         installments = self.installments.get()
         selected = self.historic.selection()
-        if self.counter_proposal.validate() and self.installments.validate() and len(selected) > 0:
+        if self.counter_proposal.validate() and self.installments.validate() and len(selected) > 0 \
+                and self.historic.has_row(selected[0]):
             selected = selected[0]
-            cpf, value, create_date, due_date, _, _ = self.historic.item(selected)["values"]
-            values_to_insert = (cpf, value, create_date, due_date, formater.format_brl(counter_proposal), installments)
-            self.historic.item(selected, values=values_to_insert)
-            app.database.edit_exception_proposal(int(selected), converter.brl_to_float(counter_proposal),
-                                                 int(installments))
+            proposal = self.historic.get_exception_proposal(selected)
+            proposal.counter_proposal = converter.brl_to_float(counter_proposal)
+            proposal.installments = int(installments)
+            self.historic.refresh(selected)
+            app.database_worker.submit(lambda database_: database_.edit_exception_proposal(
+                int(selected), converter.brl_to_float(counter_proposal), int(installments)),
+                error_callback=lambda error: self.on_error(app, f"Falha ao editar a proposta de exceção: {error}"))
+
+    def on_error(self, app: EasyServiceApp, log: str):
+        app.easy_service.do_log(log)
+        self.update(app.database_worker)
+
+    def show(self, worker_: worker.DataBaseWorker):
+        self.top_level.deiconify()
+        if self.stale:
+            self.update(worker_)
+
+    def update(self, worker_: worker.DataBaseWorker):
+        if self.top_level.state() == "withdrawn":
+            self.stale = True
+            return
+        self.stale = False
+        worker_.submit(lambda database_: database_.count_exception_proposals(),
+                       lambda total: self.historic.set_source(total, lambda *page: self.load_page(worker_, *page)),
+                       key="exception_proposals")
+
+    @staticmethod
+    def load_page(worker_: worker.DataBaseWorker, offset: int, limit: int,
+                  after: typing.Optional[ep.ExceptionProposalSent], before: typing.Optional[ep.ExceptionProposalSent],
+                  callback: typing.Callable[[typing.List[typing.Tuple[str, ep.ExceptionProposalSent]]], typing.Any]):
+        worker_.submit(lambda database_: [(str(proposal.id), proposal) for proposal in
+                                          database_.get_exception_proposals_page(offset, limit, after, before)],
+                       callback)
 
 
 class ProposalsTreeView(widgets.BrowseTreeview):
@@ -523,12 +597,15 @@ class DebitTreeView(widgets.Treeview):
 
     def insert_debit(self, debit: ep.Debit):
         self.insert("", tk.END, values=(debit.product, formater.format_brl(debit.value), debit.get_delay_days(),
-                                        debit.due_date.strftime("%d/%m/%Y")))
+                                        codec.format_date(debit.due_date)))
 
 
 class EasyServiceWindow:
+    LOG_DURATION = 3000
+
     def __init__(self, app, window: tk.Tk):
         self.window = window
+        self.scheduler = app.scheduler
         self.window.minsize(*config.MIN_RESOLUTION)
         self.window.geometry(f"{config.START_RESOLUTION[0]}x{config.START_RESOLUTION[1]}")
         self.window.protocol("WM_DELETE_WINDOW", self.on_delete_window)
@@ -536,14 +613,23 @@ class EasyServiceWindow:
         self.menu = tk.Menu(self.window)
         tools_menu = tk.Menu(tearoff=False)
         tools_menu.add_command(label="Histórico de propostas de exceção",
-                               command=app.ep_historic.top_level.deiconify)
-        tools_menu.add_command(label="Controle de acordos", command=app.agreement_control.top_level.deiconify)
+                               command=lambda: app.ep_historic.show(app.database_worker))
+        tools_menu.add_command(label="Controle de acordos",
+                               command=lambda: app.agreement_control.show(app.database_worker))
+        tools_menu.add_separator()
+        tools_menu.add_command(label="Importar acordos", command=lambda: self.on_import(app, importer.AGREEMENTS))
+        tools_menu.add_command(label="Importar propostas de exceção",
+                               command=lambda: self.on_import(app, importer.EXCEPTION_PROPOSALS))
+        tools_menu.add_separator()
+        tools_menu.add_command(label="Exportar acordos", command=lambda: self.on_export(app, importer.AGREEMENTS))
+        tools_menu.add_command(label="Exportar propostas de exceção",
+                               command=lambda: self.on_export(app, importer.EXCEPTION_PROPOSALS))
         themes_menu = tk.Menu(tearoff=False)
         themes_menu.add_command(label="Claro", command=sv_ttk.use_light_theme)
         themes_menu.add_command(label="Escuro", command=sv_ttk.use_dark_theme)
         self.menu.add_cascade(label="Ferramentas", menu=tools_menu)
         self.menu.add_cascade(label="Temas", menu=themes_menu)
-        self.menu.add_command(label="Sobre", command=app.about.top_level.deiconify)
+        self.menu.add_command(label="Sobre", command=lambda: app.about.top_level.deiconify())
         self.window.title("Atendimento fácil")
         self.window.configure(menu=self.menu)
         left_notebook = ttk.Notebook()
@@ -583,29 +669,31 @@ class EasyServiceWindow:
         left_notebook.tab(0, text="Dados")
         self.proposals = ProposalsTreeView(top_frame)
         self.proposals.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        self.generated_proposals: typing.List[str] = []
         self.refusal_reason = LabelAndWidget(top_frame, "Motivo de Recusa", ttk.Combobox,
                                              values=tuple(constants.REFUSAL_REASONS.keys()))
         self.refusal_reason.pack(side=tk.RIGHT, fill=tk.X, anchor=tk.SE, padx=(0, 10), pady=(0, 5))
         self.agreement = widgets.Button(
-            bottom_frame, text="Acordo",
+            bottom_frame, app.scheduler, text="Acordo",
             command=lambda: self.validate_agreement(lambda agreement_: self.on_agreement(app, agreement_)))
         self.agreement.pack(side=tk.LEFT, expand=True, fill=tk.X, padx=(5, 0), pady=5)
         self.copy_agreement = widgets.Button(
-            bottom_frame, text="⋯", hover_text="Copiar texto de acordo",
+            bottom_frame, app.scheduler, text="⋯", hover_text="Copiar texto de acordo",
             command=lambda: self.validate_agreement(self.on_copy_agreement))
         self.copy_agreement.pack(side=tk.LEFT, padx=(2, 0))
-        self.refusal = widgets.Button(bottom_frame, text="Recusa", command=self.on_refusal)
+        self.refusal = widgets.Button(bottom_frame, app.scheduler, text="Recusa", command=self.on_refusal)
         self.refusal.pack(side=tk.LEFT, expand=True, fill=tk.X, padx=(0, 10), pady=5)
         self.exception_proposal = widgets.Button(
-            bottom_frame, text="Proposta de exceção",
+            bottom_frame, app.scheduler, text="Proposta de exceção",
             command=lambda: self.validate_exception_proposal(
                 lambda ep_: self.on_exception_proposal(app, ep_)))
         self.exception_proposal.pack(side=tk.LEFT, expand=True, fill=tk.X)
         self.copy_exception_proposal = widgets.Button(
-            bottom_frame, text="⋯", hover_text="Copiar texto de proposta de exceção",
+            bottom_frame, app.scheduler, text="⋯", hover_text="Copiar texto de proposta de exceção",
             command=lambda: self.validate_exception_proposal(self.on_copy_exception_proposal))
         self.copy_exception_proposal.pack(side=tk.LEFT, padx=(2, 0))
-        self.next_costumer = widgets.Button(bottom_frame, text="Próximo cliente", command=lambda: self.reset())
+        self.next_costumer = widgets.Button(bottom_frame, app.scheduler, text="Próximo cliente",
+                                            command=lambda: self.reset())
         self.next_costumer.pack(side=tk.LEFT, expand=True, fill=tk.X, padx=(10, 5), pady=5)
         negotiation_frame = ttk.Frame(left_notebook)
         proposal_label_frame = ttk.LabelFrame(negotiation_frame, text="Proposta")
@@ -613,8 +701,12 @@ class EasyServiceWindow:
         proposal_options = ttk.Frame(proposal_label_frame)
         self.proposal = Proposal(proposal_label_frame, app.brl_validate_command, app.installments_validate_command,
                                  app.new_validate_command(validators.validate_date))
-        self.add = widgets.Button(proposal_options, hover_text="Adicionar", text="+", command=self.on_add_click)
+        self.add = widgets.Button(proposal_options, app.scheduler, hover_text="Adicionar", text="+",
+                                  command=self.on_add_click)
         self.add.grid(row=0, column=0)
+        self.generate = widgets.Button(proposal_options, app.scheduler, hover_text="Gerar propostas", text="⚙",
+                                       command=self.on_generate_click)
+        self.generate.grid(row=0, column=1, padx=(5, 0))
         proposal_options.grid_columnconfigure(0, weight=20)
         proposal_options.pack(side=tk.BOTTOM, anchor=tk.W, padx=5, pady=5)
         left_notebook.add(negotiation_frame)
@@ -642,10 +734,56 @@ class EasyServiceWindow:
             content = json.load(file)
             return content["theme"]
 
+    def on_import(self, app, kind: str):
+        path = filedialog.askopenfilename(parent=self.window, filetypes=(("CSV", "*.csv"), ("JSON", "*.json *.jsonl")))
+        if not path:
+            return
+        self.do_log("Importando arquivo...")
+        app.database_worker.submit(lambda database_: importer.import_file(database_, path, kind),
+                                   lambda report: self.on_import_done(app, report),
+                                   lambda error: self.do_log(f"Falha ao importar o arquivo: {error}"))
+
+    def on_import_done(self, app, report: importer.ImportReport):
+        if report.kind == importer.AGREEMENTS:
+            if app.is_loaded("agreement_control"):
+                app.agreement_control.update(app.database_worker)
+        elif app.is_loaded("ep_historic"):
+            app.ep_historic.update(app.database_worker)
+        self.do_log(f"{report.rows} registros importados ({report.get_rows_per_second():.0f} registros/s).")
+
+    def on_export(self, app, kind: str):
+        if not app.migrated:
+            self.do_log("Aguarde a atualização do banco de dados para exportar.")
+            return
+        path = filedialog.asksaveasfilename(parent=self.window, defaultextension=".csv",
+                                            filetypes=(("CSV", "*.csv"), ("Excel", "*.xlsx")))
+        if not path:
+            return
+        filters = {}
+        if kind == importer.AGREEMENTS and app.is_loaded("agreement_control"):
+            cpf, state, _, _ = app.agreement_control.get_agreements_query()
+            filters = dict(state=state, cpf=cpf, cpf_prefix=True)
+        export_worker = app.export_worker
+        self.do_log("Exportando arquivo...")
+        export_worker.submit(
+            lambda database_: exporter.export_file(
+                database_, path, kind, lambda rows: export_worker.post(self.on_export_progress, rows), **filters),
+            self.on_export_done, lambda error: self.do_log(f"Falha ao exportar o arquivo: {error}"))
+
+    def on_export_progress(self, rows: int):
+        self.do_log(f"Exportando arquivo... {rows} registros.")
+
+    def on_export_done(self, report: exporter.ExportReport):
+        self.do_log(f"{report.rows} registros exportados ({report.get_rows_per_second():.0f} registros/s).")
+
+    def on_migrations(self, reports: typing.List[migrations.MigrationReport]):
+        if reports:
+            seconds = sum(report.seconds for report in reports)
+            self.do_log(f"Banco de dados atualizado para a versão {reports[-1].version} em {seconds:.1f}s.")
+
     def do_log(self, log: str):
         self.log.config(text=log)
-        timer = threading.Timer(3, lambda: self.log.config(text=""))
-        timer.start()
+        self.scheduler.schedule(self.LOG_DURATION, lambda: self.log.config(text=""), key=self.log)
 
     def reset(self):
         for entry in (self.cpf, self.phone, self.email, self.delay_days, self.main_value, self.promotion,
@@ -653,6 +791,7 @@ class EasyServiceWindow:
             entry.delete(0, tk.END)
         self.proposal.reset()
         self.proposals.delete(*self.proposals.get_children())
+        self.generated_proposals.clear()
         self.proposal.set_due_date_with_d_plus(1)
         self.window.focus_force()
 
@@ -672,6 +811,8 @@ class EasyServiceWindow:
         if current_proposal:
             if event.widget.validate():
                 self.proposals.insert_proposal(self.proposal.get_proposal(), current_proposal)
+                if current_proposal in self.generated_proposals:
+                    self.generated_proposals.remove(current_proposal)
 
     def on_refusal(self):
         proposals = self.proposals.get_proposals()
@@ -703,11 +844,13 @@ class EasyServiceWindow:
     def on_agreement(self, app, proposal: typing.Union[ep.InstallmentProposal, ep.Proposal]):
         utils.copy_to_clipboard(self.window, proposal.get_formatted_to_register(self.product.get()))
         agreement_ = proposal.to_agreement(self.cpf.get())
-        app.database.add_agreement(agreement_)
-        app.agreement_control.historic.add_agreement(agreement_)
-        agreements = app.database.get_agreement_historic()
-        app.agreement_control.update_agreements_with_context(app.database)
-        app.agreement_control.update_statistics(agreements)
+        app.database_worker.submit(lambda database_: database_.add_agreement(agreement_),
+                                   lambda _: self.on_agreement_saved(app),
+                                   lambda error: self.do_log(f"Acordo copiado, mas falhou ao salvar: {error}"))
+
+    def on_agreement_saved(self, app):
+        if app.is_loaded("agreement_control"):
+            app.agreement_control.update(app.database_worker)
         self.do_log("Acordo copiado e salvo com sucesso.")
 
     def on_copy_agreement(self, proposal: typing.Union[ep.InstallmentProposal, ep.Proposal]):
@@ -748,8 +891,14 @@ class EasyServiceWindow:
     def on_exception_proposal(self, app, exception_proposal: ep.ExceptionProposal):
         utils.copy_to_clipboard(self.window, exception_proposal.get_text_to_copy())
         exception_proposal_sent = exception_proposal.to_exception_proposal_sent()
-        app.database.add_exception_proposal(exception_proposal_sent)
-        app.ep_historic.historic.add_exception_proposal(exception_proposal_sent)
+        app.database_worker.submit(
+            lambda database_: database_.add_exception_proposal(exception_proposal_sent),
+            lambda _: self.on_exception_proposal_saved(app, exception_proposal_sent),
+            lambda error: self.do_log(f"Proposta de exceção copiada, mas falhou ao salvar: {error}"))
+
+    def on_exception_proposal_saved(self, app, exception_proposal_sent: ep.ExceptionProposalSent):
+        if app.is_loaded("ep_historic"):
+            app.ep_historic.historic.add_exception_proposal(exception_proposal_sent)
         self.do_log("Proposta de exceção salva e copiada com sucesso.")
 
     def on_copy_exception_proposal(self, exception_proposal: ep.ExceptionProposal):
@@ -771,18 +920,85 @@ class EasyServiceWindow:
         if len(self.proposals.get_children()) >= 2:
             self.proposal.set_due_date_with_d_plus(3)
 
+    def on_generate_click(self):
+        product = regex.PRODUCT.fullmatch(self.product.get())
+        if product is None:
+            self.do_log("Preencha o produto corretamente para gerar propostas.")
+        elif not self.main_value.validate():
+            self.do_log("Preencha o valor principal corretamente para gerar propostas.")
+        elif not self.promotion.validate():
+            self.do_log("Preencha o valor com desconto corretamente para gerar propostas.")
+        elif not self.proposal.due_date.validate():
+            self.do_log("Preencha a data de vencimento corretamente para gerar propostas.")
+        else:
+            max_installments = constants.MAX_INSTALMENTS[ep.DEBIT_PRODUCTS[product.lastgroup]]
+            due_date = converter.parse_date(self.proposal.due_date.get())
+            generated = plans.generate_plans(converter.brl_to_float(self.main_value.get()),
+                                             converter.brl_to_float(self.promotion.get()), max_installments)
+            self.proposals.delete(*(key for key in self.generated_proposals if self.proposals.exists(key)))
+            self.generated_proposals = [self.proposals.insert_proposal(plan.to_proposal(due_date))
+                                        for plan in plans.get_best_plans(generated)]
+            self.do_log(f"{len(generated)} planos calculados, melhores propostas adicionadas.")
+
 
 class EasyServiceApp:
+    LAZY_WINDOWS = ("agreement_control", "ep_historic", "about")
+
     def __init__(self):
-        self.database = database.DataBase()
         self.window = tk.Tk()
+        self.scheduler = scheduler.Scheduler(self.window)
+        self.database_worker = worker.DataBaseWorker(self.window)
+        self.database_worker.start()
+        self.migrated = False
         self.brl_validate_command = self.new_validate_command(regex.BRL.fullmatch)
         self.installments_validate_command = self.new_validate_command(validators.validate_installments)
-        self.agreement_control = AgreementControlWindow(self.database)
-        self.about = about.AboutWindow()
-        self.ep_historic = ExceptionProposalHistoricWindow(self, self.window)
         self.easy_service = EasyServiceWindow(self, self.window)
+        self.database_worker.submit(lambda database_: database_.migration_reports, self.on_migrations,
+                                    lambda error: self.easy_service.do_log(f"Falha ao abrir o banco de dados: {error}"))
+        self.retention = retention.RetentionJob(self.database_worker.path)
+        self.window.after_idle(self.on_first_frame)
         self.window.mainloop()
+        self.retention.stop()
+        if self.is_loaded("export_worker"):
+            self.export_worker.stop()
+        self.database_worker.stop()
+
+    @functools.cached_property
+    def agreement_control(self) -> AgreementControlWindow:
+        return AgreementControlWindow(self.database_worker, self.easy_service.do_log)
+
+    @functools.cached_property
+    def ep_historic(self) -> ExceptionProposalHistoricWindow:
+        return ExceptionProposalHistoricWindow(self, self.window)
+
+    @functools.cached_property
+    def about(self) -> about.AboutWindow:
+        return about.AboutWindow()
+
+    @functools.cached_property
+    def export_worker(self) -> worker.DataBaseWorker:
+        export_worker = worker.DataBaseWorker(self.window, self.database_worker.path)
+        export_worker.start()
+        return export_worker
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self.__dict__
+
+    def on_migrations(self, reports: typing.List[migrations.MigrationReport]):
+        self.migrated = True
+        self.retention.start()
+        self.easy_service.on_migrations(reports)
+
+    def on_first_frame(self):
+        timing.mark("first frame")
+        self.window.after(config.PREFETCH_DELAY, lambda: self.prefetch(self.LAZY_WINDOWS))
+
+    def prefetch(self, windows: typing.Sequence[str]):
+        if windows:
+            getattr(self, windows[0])
+            self.window.after(config.PREFETCH_DELAY, lambda: self.prefetch(windows[1:]))
+        else:
+            timing.mark("prefetch")
 
     def new_validate_command(self, validate_command: typing.Union[typing.Callable[[str], bool], str, typing.Pattern]):
         return dict(validate="focusout",
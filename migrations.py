@@ -0,0 +1,278 @@
+import logging
+import sqlite3
+import time
+import typing
+
+from common import constants
+
+BACKFILL_BATCH_SIZE = 5000
+MIGRATION_BUSY_TIMEOUT = 120000
+
+CPF_NUMBER = "CAST(replace(replace(cpf, '.', ''), '-', '') AS INTEGER)"
+
+SchemaCommand = typing.Union[str, typing.Callable[[sqlite3.Cursor], None]]
+
+logger = logging.getLogger(__name__)
+
+
+class Backfill:
+    def __init__(self, table: str, assignments: str, pending: str, parameters: tuple = ()):
+        self.table = table
+        self.assignments = assignments
+        self.pending = pending
+        self.parameters = parameters
+
+    def run(self, connection: sqlite3.Connection, batch_size: int = BACKFILL_BATCH_SIZE):
+        command = f"UPDATE {self.table} SET {self.assignments} WHERE id IN " \
+                  f"(SELECT id FROM {self.table} WHERE {self.pending} LIMIT ?);"
+        while True:
+            connection.execute("BEGIN IMMEDIATE;")
+            with connection:
+                updated = connection.execute(command, (*self.parameters, batch_size)).rowcount
+            if updated < batch_size:
+                break
+
+
+class Migration:
+    def __init__(self, version: int, description: str, schema: typing.Iterable[SchemaCommand],
+                 backfills: typing.Iterable[Backfill] = (), indexes: typing.Iterable[str] = ()):
+        self.version = version
+        self.description = description
+        self.schema = tuple(schema)
+        self.backfills = tuple(backfills)
+        self.indexes = tuple(indexes)
+
+    def apply(self, connection: sqlite3.Connection) -> bool:
+        if not self.run_in_transaction(connection, self.schema, self.version):
+            return False
+        for backfill in self.backfills:
+            backfill.run(connection)
+        return self.run_in_transaction(connection, (*self.indexes, f"PRAGMA user_version = {self.version};"),
+                                       self.version)
+
+    @staticmethod
+    def run_in_transaction(connection: sqlite3.Connection, commands: typing.Iterable[SchemaCommand],
+                           version: typing.Optional[int] = None) -> bool:
+        cursor = connection.cursor()
+        cursor.execute("BEGIN IMMEDIATE;")
+        try:
+            if version is not None and get_version(connection) >= version:
+                connection.rollback()
+                return False
+            for command in commands:
+                if callable(command):
+                    command(cursor)
+                else:
+                    cursor.execute(command)
+        except BaseException:
+            connection.rollback()
+            raise
+        else:
+            connection.commit()
+            return True
+
+
+class MigrationReport:
+    def __init__(self, version: int, description: str, seconds: float):
+        self.version = version
+        self.description = description
+        self.seconds = seconds
+
+
+def add_column(table: str, column: str, definition: str) -> typing.Callable[[sqlite3.Cursor], None]:
+    def routine(cursor: sqlite3.Cursor):
+        columns = [row[1] for row in cursor.execute(f"PRAGMA table_info({table});")]
+        if column not in columns:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition};")
+    return routine
+
+
+def get_rollup_update(row: str, sign: str) -> str:
+    return f"""
+        INSERT OR IGNORE INTO agreement_rollup (day) VALUES ({row}.create_date);
+        UPDATE agreement_rollup SET negotiated_count = negotiated_count {sign} 1,
+        negotiated_sum = negotiated_sum {sign} {row}.value,
+        payed_count = payed_count {sign} ({row}.payed != 0),
+        payed_sum = payed_sum {sign} ({row}.payed != 0) * {row}.value,
+        promise_count = promise_count {sign} (NOT {row}.payed AND {row}.promise),
+        promise_sum = promise_sum {sign} (NOT {row}.payed AND {row}.promise) * {row}.value
+        WHERE day = {row}.create_date;
+        INSERT OR IGNORE INTO agreement_rollup (day) VALUES ({row}.cancel_date);
+        UPDATE agreement_rollup SET cancel_count = cancel_count {sign} (NOT {row}.payed AND NOT {row}.promise),
+        cancel_sum = cancel_sum {sign} (NOT {row}.payed AND NOT {row}.promise) * {row}.value
+        WHERE day = {row}.cancel_date;"""
+
+
+def get_open_rollup_update(row: str, sign: str) -> str:
+    return f"""
+        INSERT OR IGNORE INTO agreement_open_rollup (day, due_date, cancel_date)
+        SELECT {row}.create_date, {row}.due_date, {row}.cancel_date WHERE NOT {row}.payed AND NOT {row}.promise;
+        UPDATE agreement_open_rollup SET open_count = open_count {sign} 1, open_sum = open_sum {sign} {row}.value
+        WHERE NOT {row}.payed AND NOT {row}.promise AND day = {row}.create_date AND due_date = {row}.due_date
+        AND cancel_date = {row}.cancel_date;"""
+
+
+MIGRATIONS = (
+    Migration(1, "Tabelas de propostas de exceção e acordos", (
+        """
+        CREATE TABLE IF NOT EXISTS exception_proposals (
+        cpf char(11) NOT NULL,
+        value DOUBLE(6, 2) NOT NULL,
+        date DATE NOT NULL,
+        d_plus BIT(5) NOT NULL,
+        counter_proposal DOUBLE(6, 2),
+        installments BIT(24),
+        id INTEGER PRIMARY KEY AUTOINCREMENT
+        )""",
+        """
+        CREATE TABLE IF NOT EXISTS agreements (
+        cpf char(11) NOT NULL,
+        value DOUBLE(6, 2) NOT NULL,
+        create_date DATE NOT NULL,
+        d_plus BIT(3) NOT NULL,
+        payed bool NOT NULL,
+        promise bool NOT NULL,
+        id INTEGER PRIMARY KEY AUTOINCREMENT
+        )""",
+    )),
+    Migration(2, "Índices de filtro e arquivo de propostas de exceção", (
+        """
+        CREATE TABLE IF NOT EXISTS exception_proposals_archive (
+        cpf char(11) NOT NULL,
+        value DOUBLE(6, 2) NOT NULL,
+        date DATE NOT NULL,
+        d_plus BIT(5) NOT NULL,
+        counter_proposal DOUBLE(6, 2),
+        installments BIT(24),
+        id INTEGER PRIMARY KEY
+        )""",
+    ), indexes=(
+        "CREATE INDEX IF NOT EXISTS exception_proposals_date ON exception_proposals (date);",
+        "CREATE INDEX IF NOT EXISTS agreements_cpf ON agreements (cpf);",
+        "CREATE INDEX IF NOT EXISTS agreements_create_date ON agreements (create_date);",
+    )),
+    Migration(3, "Datas de vencimento e cancelamento dos acordos", (
+        add_column("agreements", "due_date", "DATE"),
+        add_column("agreements", "cancel_date", "DATE"),
+        "DROP INDEX IF EXISTS agreements_due_date;",
+    ), backfills=(
+        Backfill("agreements", "due_date = date(create_date, d_plus || ' days'), "
+                               "cancel_date = date(create_date, (d_plus + ?) || ' days')",
+                 "due_date IS NULL", (constants.CANCEL_IN_DAYS,)),
+    ), indexes=(
+        "CREATE INDEX IF NOT EXISTS agreements_due_date ON agreements (due_date);",
+        "CREATE INDEX IF NOT EXISTS agreements_cancel_date ON agreements (cancel_date);",
+    )),
+    Migration(4, "CPF numérico dos acordos e propostas de exceção", (
+        add_column("agreements", "cpf_number", "INTEGER"),
+        add_column("exception_proposals", "cpf_number", "INTEGER"),
+        "DROP INDEX IF EXISTS agreements_cpf;",
+    ), backfills=(
+        Backfill("agreements", f"cpf_number = {CPF_NUMBER}", "cpf_number IS NULL"),
+        Backfill("exception_proposals", f"cpf_number = {CPF_NUMBER}", "cpf_number IS NULL"),
+    ), indexes=(
+        "CREATE INDEX IF NOT EXISTS agreements_cpf_number ON agreements (cpf_number);",
+        "CREATE INDEX IF NOT EXISTS exception_proposals_cpf_number ON exception_proposals (cpf_number);",
+    )),
+    Migration(5, "Consolidação diária dos acordos", (
+        """
+        CREATE TABLE IF NOT EXISTS agreement_rollup (
+        day DATE NOT NULL PRIMARY KEY,
+        negotiated_count INTEGER NOT NULL DEFAULT 0,
+        negotiated_sum DOUBLE NOT NULL DEFAULT 0,
+        payed_count INTEGER NOT NULL DEFAULT 0,
+        payed_sum DOUBLE NOT NULL DEFAULT 0,
+        promise_count INTEGER NOT NULL DEFAULT 0,
+        promise_sum DOUBLE NOT NULL DEFAULT 0,
+        cancel_count INTEGER NOT NULL DEFAULT 0,
+        cancel_sum DOUBLE NOT NULL DEFAULT 0
+        )""",
+        f"""
+        CREATE TRIGGER IF NOT EXISTS agreements_rollup_insert AFTER INSERT ON agreements BEGIN
+        {get_rollup_update("NEW", "+")}
+        END""",
+        f"""
+        CREATE TRIGGER IF NOT EXISTS agreements_rollup_delete AFTER DELETE ON agreements BEGIN
+        {get_rollup_update("OLD", "-")}
+        END""",
+        f"""
+        CREATE TRIGGER IF NOT EXISTS agreements_rollup_update
+        AFTER UPDATE OF value, create_date, payed, promise, cancel_date ON agreements BEGIN
+        {get_rollup_update("OLD", "-")}
+        {get_rollup_update("NEW", "+")}
+        END""",
+        "DELETE FROM agreement_rollup;",
+        """
+        INSERT INTO agreement_rollup (day, negotiated_count, negotiated_sum, payed_count, payed_sum, promise_count,
+        promise_sum, cancel_count, cancel_sum)
+        SELECT day, sum(negotiated), total(negotiated * value), sum(payed), total(payed * value), sum(promise),
+        total(promise * value), sum(cancel), total(cancel * value) FROM (
+        SELECT create_date AS day, 1 AS negotiated, payed != 0 AS payed, NOT payed AND promise AS promise,
+        0 AS cancel, value FROM agreements
+        UNION ALL
+        SELECT cancel_date, 0, 0, 0, NOT payed AND NOT promise, value FROM agreements WHERE cancel_date IS NOT NULL
+        ) GROUP BY day;""",
+    )),
+    Migration(6, "Consolidação diária dos acordos em aberto", (
+        """
+        CREATE TABLE IF NOT EXISTS agreement_open_rollup (
+        day DATE NOT NULL,
+        due_date DATE NOT NULL,
+        cancel_date DATE NOT NULL,
+        open_count INTEGER NOT NULL DEFAULT 0,
+        open_sum DOUBLE NOT NULL DEFAULT 0,
+        PRIMARY KEY (day, due_date, cancel_date)
+        )""",
+        f"""
+        CREATE TRIGGER IF NOT EXISTS agreements_open_rollup_insert AFTER INSERT ON agreements BEGIN
+        {get_open_rollup_update("NEW", "+")}
+        END""",
+        f"""
+        CREATE TRIGGER IF NOT EXISTS agreements_open_rollup_delete AFTER DELETE ON agreements BEGIN
+        {get_open_rollup_update("OLD", "-")}
+        END""",
+        f"""
+        CREATE TRIGGER IF NOT EXISTS agreements_open_rollup_update
+        AFTER UPDATE OF value, create_date, payed, promise, due_date, cancel_date ON agreements BEGIN
+        {get_open_rollup_update("OLD", "-")}
+        {get_open_rollup_update("NEW", "+")}
+        END""",
+        "DELETE FROM agreement_open_rollup;",
+        """
+        INSERT INTO agreement_open_rollup (day, due_date, cancel_date, open_count, open_sum)
+        SELECT create_date, due_date, cancel_date, count(*), total(value) FROM agreements
+        WHERE NOT payed AND NOT promise AND due_date IS NOT NULL AND cancel_date IS NOT NULL
+        GROUP BY create_date, due_date, cancel_date;""",
+    )),
+    Migration(7, "Índices de ordenação dos acordos", (), indexes=(
+        "CREATE INDEX IF NOT EXISTS agreements_value ON agreements (value);",
+        "CREATE INDEX IF NOT EXISTS agreements_payed ON agreements (payed);",
+        "CREATE INDEX IF NOT EXISTS agreements_promise ON agreements (promise);",
+    )),
+)
+
+
+def get_version(connection: sqlite3.Connection) -> int:
+    return connection.execute("PRAGMA user_version;").fetchone()[0]
+
+
+def migrate(connection: sqlite3.Connection, migrations: typing.Iterable[Migration] = MIGRATIONS
+            ) -> typing.List[MigrationReport]:
+    reports = []
+    version = get_version(connection)
+    pending = [migration for migration in migrations if migration.version > version]
+    if not pending:
+        return reports
+    busy_timeout = connection.execute("PRAGMA busy_timeout;").fetchone()[0]
+    connection.execute(f"PRAGMA busy_timeout = {MIGRATION_BUSY_TIMEOUT};")
+    try:
+        for migration in pending:
+            start = time.perf_counter()
+            if not migration.apply(connection):
+                continue
+            report = MigrationReport(migration.version, migration.description, time.perf_counter() - start)
+            logger.info("Migração %s (%s) aplicada em %.3fs", report.version, report.description, report.seconds)
+            reports.append(report)
+    finally:
+        connection.execute(f"PRAGMA busy_timeout = {busy_timeout};")
+    return reports
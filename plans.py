@@ -0,0 +1,59 @@
+import datetime
+import typing
+
+import exception_proposal as ep
+from common import config
+
+
+class Plan:
+    __slots__ = ("installments", "entry_cents", "rest_cents", "total_cents", "discount")
+
+    def __init__(self, installments: int, entry_cents: int, rest_cents: int, total_cents: int, discount: float):
+        self.installments = installments
+        self.entry_cents = entry_cents
+        self.rest_cents = rest_cents
+        self.total_cents = total_cents
+        self.discount = discount
+
+    def to_proposal(self, due_date: datetime.date) -> typing.Union[ep.Proposal, ep.InstallmentProposal]:
+        if self.installments == 1:
+            return ep.Proposal(self.entry_cents / 100, due_date)
+        return ep.InstallmentProposal(self.installments, self.entry_cents / 100, self.rest_cents / 100, due_date)
+
+
+def get_total_cents(main_cents: int, promotion_cents: int, installments: int, max_installments: int) -> int:
+    if max_installments == 1:
+        return promotion_cents
+    return promotion_cents + (main_cents - promotion_cents) * (installments - 1) // (max_installments - 1)
+
+
+def generate_plans(main_value: float, promotion: float, max_installments: int,
+                   entry_ratios: typing.Sequence[float] = config.PLAN_ENTRY_RATIOS,
+                   min_installment: float = config.MIN_INSTALLMENT_VALUE) -> typing.List[Plan]:
+    main_cents, promotion_cents = round(main_value * 100), round(promotion * 100)
+    min_cents = round(min_installment * 100)
+    plans = [Plan(1, promotion_cents, 0, promotion_cents, round((1 - promotion_cents / main_cents) * 100, 2))]
+    for installments in range(2, max_installments + 1):
+        total = get_total_cents(main_cents, promotion_cents, installments, max_installments)
+        discount = round((1 - total / main_cents) * 100, 2)
+        entries = {total // installments, *(round(total * ratio) for ratio in entry_ratios)}
+        for entry in sorted(entries):
+            rest = (total - entry) // (installments - 1)
+            entry = total - rest * (installments - 1)
+            if rest >= min_cents and entry >= min_cents:
+                plans.append(Plan(installments, entry, rest, total, discount))
+    return plans
+
+
+def get_best_plans(plans: typing.Sequence[Plan], count: int = config.PLAN_SUGGESTIONS) -> typing.List[Plan]:
+    best = {}
+    for plan in plans:
+        if plan.entry_cents < plan.rest_cents:
+            continue
+        if plan.installments not in best or plan.entry_cents < best[plan.installments].entry_cents:
+            best[plan.installments] = plan
+    installments = sorted(best)
+    if len(installments) <= count:
+        return [best[installment] for installment in installments]
+    step = (len(installments) - 1) / max(count - 1, 1)
+    return [best[installments[round(index * step)]] for index in range(count)]
@@ -0,0 +1,64 @@
+import datetime
+import logging
+import threading
+import typing
+
+import database
+from common import config
+
+logger = logging.getLogger(__name__)
+
+
+class RetentionJob:
+    def __init__(self, path: str = "database.db", days: int = config.EXCEPTION_PROPOSALS_RETENTION_DAYS,
+                 archive: bool = config.ARCHIVE_OLD_EXCEPTION_PROPOSALS,
+                 interval: typing.Optional[float] = config.RETENTION_INTERVAL,
+                 retry_interval: float = config.RETENTION_RETRY_INTERVAL):
+        self.path = path
+        self.days = days
+        self.archive = archive
+        self.interval = interval
+        self.retry_interval = retry_interval
+        self.last_purged: typing.Optional[int] = None
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self.routine, name="retention", daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def run_once(self, database_: database.DataBase) -> int:
+        before = datetime.date.today() - datetime.timedelta(days=self.days)
+        purged = database_.purge_exception_proposals(before, self.archive)
+        if database_.has_incremental_vacuum():
+            self.vacuum(database_)
+        self.last_purged = purged
+        return purged
+
+    def vacuum(self, database_: database.DataBase):
+        free_pages = None
+        while free_pages != 0 and not self.stop_event.is_set():
+            previous, free_pages = free_pages, database_.vacuum_incrementally(config.VACUUM_PAGES_PER_STEP)
+            if free_pages == previous:
+                break
+
+    def routine(self):
+        database_ = None
+        try:
+            while not self.stop_event.is_set():
+                interval = self.interval
+                try:
+                    if database_ is None:
+                        database_ = database.DataBase(self.path)
+                    self.run_once(database_)
+                except Exception:
+                    logger.exception("Falha ao limpar as propostas de exceção antigas")
+                    if interval is not None:
+                        interval = min(interval, self.retry_interval)
+                if interval is None or self.stop_event.wait(interval):
+                    break
+        finally:
+            if database_ is not None:
+                database_.sqlite_connection.close()
@@ -14,5 +14,6 @@ setup(
     name="easy_service",
     version=f"0.{config.VERSION}",
     options={"build_exe": build_exe_options},
-    executables=[Executable("main.py", base=base, icon="icon.ico")]
+    executables=[Executable("main.py", base=base, icon="icon.ico"),
+                 Executable("cli.py", base=None, icon="icon.ico", target_name="easy_service_cli")]
 )
@@ -0,0 +1,139 @@
+import queue
+import threading
+import tkinter as tk
+import typing
+
+import database
+from common import timing
+
+
+class Job:
+    def __init__(self, function: typing.Callable[[database.DataBase], typing.Any],
+                 callback: typing.Optional[typing.Callable[[typing.Any], typing.Any]] = None,
+                 error_callback: typing.Optional[typing.Callable[[BaseException], typing.Any]] = None,
+                 key: typing.Optional[str] = None):
+        self.function = function
+        self.callback = callback
+        self.error_callback = error_callback
+        self.key = key
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class DataBaseWorker:
+    POLL_INTERVAL = 15
+
+    def __init__(self, master: tk.Misc, path: str = "database.db"):
+        self.master = master
+        self.path = path
+        self.jobs: "queue.Queue[typing.Optional[Job]]" = queue.Queue()
+        self.results: "queue.Queue[typing.Tuple[typing.Optional[Job], typing.Any, typing.Optional[BaseException]]]" = \
+            queue.Queue()
+        self.keyed_jobs: typing.Dict[str, Job] = {}
+        self.unfinished = 0
+        self.polling = False
+        self.thread = threading.Thread(target=self.routine, name="database", daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.jobs.put(None)
+        self.thread.join()
+
+    def submit(self, function: typing.Callable[[database.DataBase], typing.Any],
+               callback: typing.Optional[typing.Callable[[typing.Any], typing.Any]] = None,
+               error_callback: typing.Optional[typing.Callable[[BaseException], typing.Any]] = None,
+               key: typing.Optional[str] = None) -> Job:
+        job = Job(function, callback, error_callback, key)
+        if key is not None:
+            self.cancel(key)
+            self.keyed_jobs[key] = job
+        self.unfinished += 1
+        self.jobs.put(job)
+        if not self.polling:
+            self.polling = True
+            self.master.after(self.POLL_INTERVAL, self.poll)
+        return job
+
+    def post(self, callback: typing.Callable[..., typing.Any], *args: typing.Any):
+        self.results.put((None, (callback, args), None))
+
+    def cancel(self, key: str):
+        job = self.keyed_jobs.pop(key, None)
+        if job is not None:
+            job.cancel()
+
+    def routine(self):
+        try:
+            database_ = database.DataBase(self.path)
+        except Exception as error:
+            self.post(self.report_error, error)
+            self.fail_jobs(error)
+            return
+        timing.mark("database")
+        try:
+            while True:
+                job = self.jobs.get()
+                if job is None:
+                    break
+                if job.cancelled:
+                    self.results.put((job, None, None))
+                    continue
+                try:
+                    result = job.function(database_)
+                except Exception as error:
+                    self.results.put((job, None, error))
+                else:
+                    self.results.put((job, result, None))
+        finally:
+            database_.sqlite_connection.close()
+
+    def fail_jobs(self, error: BaseException):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                break
+            self.results.put((job, None, error))
+
+    def report_error(self, error: BaseException):
+        self.master.report_callback_exception(type(error), error, error.__traceback__)
+
+    def poll(self):
+        while True:
+            try:
+                job, result, error = self.results.get_nowait()
+            except queue.Empty:
+                break
+            if job is None:
+                self.deliver_post(*result)
+                continue
+            self.unfinished -= 1
+            if job.key is not None and self.keyed_jobs.get(job.key) is job:
+                del self.keyed_jobs[job.key]
+            if not job.cancelled:
+                self.deliver(job, result, error)
+        if self.unfinished:
+            self.master.after(self.POLL_INTERVAL, self.poll)
+        else:
+            self.polling = False
+
+    def deliver_post(self, callback: typing.Callable[..., typing.Any], args: tuple):
+        try:
+            callback(*args)
+        except Exception as exception:
+            self.report_error(exception)
+
+    def deliver(self, job: Job, result: typing.Any, error: typing.Optional[BaseException]):
+        try:
+            if error is None:
+                if job.callback is not None:
+                    job.callback(result)
+            elif job.error_callback is not None:
+                job.error_callback(error)
+            else:
+                raise error
+        except Exception as exception:
+            self.report_error(exception)